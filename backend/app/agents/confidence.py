@@ -0,0 +1,79 @@
+"""Per-field confidence for LLM extractions.
+
+Token logprobs are preferred when the provider returns them (`llm_logprobs`):
+the confidence of a value is the geometric mean probability of the tokens it
+was generated from. Otherwise the model's self-reported score is used,
+clamped to [0, 1]; `llm_field_confidence` covers responses that carry
+neither.
+"""
+
+import math
+from typing import Any, List, Optional, Tuple
+
+from app.config.settings import settings
+
+
+def token_logprobs(logprobs: Any) -> List[Tuple[str, float]]:
+    """(token, logprob) pairs from an OpenAI-style logprobs payload.
+
+    Accepts provider objects, their dict form, or an already-normalized
+    list of pairs (as stored in the LLM cache).
+    """
+    if not logprobs:
+        return []
+    if isinstance(logprobs, list):
+        return [(str(token), float(logprob)) for token, logprob in logprobs]
+    content = logprobs.get("content") if isinstance(logprobs, dict) else getattr(logprobs, "content", None)
+    pairs = []
+    for entry in content or []:
+        if isinstance(entry, dict):
+            pairs.append((entry["token"], float(entry["logprob"])))
+        else:
+            pairs.append((entry.token, float(entry.logprob)))
+    return pairs
+
+
+def span_confidence(logprobs: Any, value: str) -> Optional[float]:
+    """Geometric mean probability of the tokens that produced `value`, if found."""
+    tokens = token_logprobs(logprobs)
+    if not tokens or not value:
+        return None
+
+    completion = "".join(token for token, _ in tokens)
+    # The answer comes after the reasoning, so prefer the last occurrence
+    start = completion.rfind(value)
+    if start < 0:
+        return None
+    end = start + len(value)
+
+    offset = 0
+    span = []
+    for token, logprob in tokens:
+        if offset < end and offset + len(token) > start:
+            span.append(logprob)
+        offset += len(token)
+    if not span:
+        return None
+    return math.exp(sum(span) / len(span))
+
+
+def clamp_confidence(reported: Any) -> Optional[float]:
+    """A self-reported score as a float in [0, 1], or None if it is not a number."""
+    try:
+        score = float(reported)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(score):
+        return None
+    # Some models answer on a 0-100 scale
+    if score > 1.0:
+        score /= 100.0
+    return min(1.0, max(0.0, score))
+
+
+def field_confidence(value: str, reported: Any = None, logprobs: Any = None) -> float:
+    """Best available confidence for one extracted value."""
+    for confidence in (span_confidence(logprobs, value), clamp_confidence(reported)):
+        if confidence is not None:
+            return round(confidence, 3)
+    return settings.llm_field_confidence
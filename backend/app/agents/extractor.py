@@ -1,36 +1,209 @@
-# Simplified version - agents will be implemented separately
+# Rule-based extraction - used as the fast tier in front of the DSPy agents
 import re
-from typing import Dict, List
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, List, Set, Tuple
 
-class SimpleExtractor:
-    """Placeholder extractor - will be replaced with DSPy agents"""
+# Utterances made up only of these phrases carry no form data. They are matched
+# token by token, so no pattern ever backtracks over the whole utterance.
+FILLER_TOKEN = re.compile(r"u+m+|u+h+|h+m+|m+|o+k+a*y*")
+FILLER_PHRASES = sorted(
+    {
+        ("alright",), ("all", "right"), ("right",), ("so",), ("well",), ("yeah",), ("sure",),
+        ("thanks",), ("thank", "you"), ("got", "it"), ("i", "see"), ("hold", "on"),
+        *(("let", "me", verb) for verb in ("check", "see", "think")),
+        *((*just, article, unit) for just in ((), ("just",)) for article in ("one", "a")
+          for unit in ("moment", "second", "sec")),
+    },
+    key=len,
+    reverse=True
+)
+_FILLER_SPLIT = re.compile(r"[^\w']+")
+
+def is_filler_text(text: str) -> bool:
+    """True if every token of the text belongs to a filler word or phrase."""
+    tokens = [token for token in _FILLER_SPLIT.split(text.lower()) if token]
+    position = 0
+    while position < len(tokens):
+        if FILLER_TOKEN.fullmatch(tokens[position]):
+            position += 1
+            continue
+        for phrase in FILLER_PHRASES:
+            if tuple(tokens[position:position + len(phrase)]) == phrase:
+                position += len(phrase)
+                break
+        else:
+            return False
+    return True
+
+# "field: value" mentions, and the weaker "field value"
+LABELED_CONFIDENCE = 0.85
+UNLABELED_CONFIDENCE = 0.6
+
+# Structured values with how far their matches can be trusted, compiled once.
+# A tuple gives one confidence per alternative (capture group) of the pattern.
+KNOWN_PATTERNS = {
+    "email": (re.compile(r'\b([A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,})\b', re.IGNORECASE), 0.95),
+    "phone": (re.compile(r'\b(\d{3}[-.]?\d{3}[-.]?\d{4})\b', re.IGNORECASE), 0.9),
+    "name": (re.compile(r'(?:my name is|i am|this is|patient.*?name.*?is)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', re.IGNORECASE), 0.75),
+    # "N years old" alone may be about someone else ("my 80 year old mother"), so it is left to the LLM
+    "age": (re.compile(r'\b(?:age(?:\s+is)?|aged)\s*:?\s*(\d{1,3})\b|\b(\d{1,3})\s+years?\s+old\b', re.IGNORECASE),
+            (0.8, UNLABELED_CONFIDENCE)),
+    "condition": (re.compile(r'(?:has|diagnosed with|suffers from)\s+([a-zA-Z\s]+)', re.IGNORECASE), 0.5),
+}
+# Matches these checks reject are skipped in favour of a later match
+VALUE_CHECKS = {
+    "age": lambda value: 0 < int(value) <= 120,
+}
+# Spoken placeholders for "no value"
+NULL_VALUES = {"none", "n/a", "na", "n a", "unknown", "not applicable", "nil", "null", "-"}
+
+def _is_null(value: str) -> bool:
+    return not value or value.strip(" .!?").lower() in NULL_VALUES
+
+def _label_key(label: str) -> str:
+    return re.sub(r"[\s_]+", " ", label.strip().lower())
+
+# What may follow a label, and what ends a value (besides the next "label:")
+_LABEL_SEPARATOR = re.compile(r'\s*:\s*|\s+')
+_VALUE_STOP = re.compile(r'[,.;!?\n]|\s+and\b', re.IGNORECASE)
+
+class FieldMatcher:
+    """A schema's field patterns, compiled once.
     
-    def extract_fields(self, text: str, fields: List[str]) -> Dict[str, str]:
-        # Basic pattern matching for MVP
-        extracted = {}
+    Every generic field label goes into a single alternation, so one finditer
+    pass finds all label mentions instead of one search per field. A value
+    ends at a comma, sentence end, " and ", or the next "label:"; those
+    positions are collected once and each value is cut at the first one
+    after it, so matching stays linear in the length of the utterance.
+    """
+    
+    def __init__(self, fields: Tuple[str, ...]):
+        self.fields = fields
+        self.known = [(field, *KNOWN_PATTERNS[field.strip().lower()])
+                      for field in fields if field.strip().lower() in KNOWN_PATTERNS]
+        self.labels = {_label_key(field): field for field in fields
+                       if field.strip().lower() not in KNOWN_PATTERNS and field.strip()}
         
-        # Simple extraction patterns
-        patterns = {
-            "email": r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-            "phone": r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',
-            "name": r'(?:my name is|i am|this is|patient.*?name.*?is)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
-            "age": r'(?:age|years old|age is)\s+(\d{1,3})',
-            "condition": r'(?:has|diagnosed with|suffers from)\s+([a-zA-Z\s]+)',
-        }
+        self.pattern = None
+        if self.labels:
+            # Longest first so "blood pressure" wins over "blood"; spoken labels
+            # use spaces where schema columns use underscores
+            alternation = "|".join(
+                re.escape(label).replace(r"\ ", r"[\s_]+")
+                for label in sorted(self.labels, key=len, reverse=True)
+            )
+            self.pattern = re.compile(rf'(?<!\w)(?:{alternation})', re.IGNORECASE)
+    
+    def match(self, text: str) -> Dict[str, Tuple[str, float]]:
+        """Extract {field: (value, confidence)}.
         
-        for field in fields:
-            field_lower = field.lower()
-            if field_lower in patterns:
-                match = re.search(patterns[field_lower], text, re.IGNORECASE)
-                if match:
-                    extracted[field] = match.group(1) if match.groups() else match.group(0)
-            else:
-                # For other fields, look for "field: value" pattern
-                pattern = rf'{field}[:\s]+([^,\.\n]+)'
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    extracted[field] = match.group(1).strip()
+        For known patterns the most confident valid match wins, for labels the
+        first mention.
+        """
+        extracted: Dict[str, Tuple[str, float]] = {}
+        
+        for field, pattern, confidences in self.known:
+            check = VALUE_CHECKS.get(field.strip().lower())
+            for match in pattern.finditer(text):
+                index, value = next((i, group) for i, group in enumerate(match.groups()) if group is not None)
+                value = value.strip()
+                confidence = confidences[index] if isinstance(confidences, tuple) else confidences
+                if _is_null(value) or (check is not None and not check(value)):
+                    continue
+                if field not in extracted or confidence > extracted[field][1]:
+                    extracted[field] = (value, confidence)
+        
+        if self.pattern is not None:
+            mentions = []
+            for label in self.pattern.finditer(text):
+                separator = _LABEL_SEPARATOR.match(text, label.end())
+                if separator is not None:
+                    mentions.append((label, separator))
+            if not mentions:
+                return extracted
+            
+            stops = [stop.start() for stop in _VALUE_STOP.finditer(text)]
+            stops.extend(label.start() for label, separator in mentions if ":" in separator.group())
+            stops.sort()
+            for label, separator in mentions:
+                field = self.labels[_label_key(label.group())]
+                start = separator.end()
+                position = bisect_left(stops, start)
+                value = text[start:stops[position] if position < len(stops) else len(text)].strip()
+                if field in extracted or _is_null(value):
+                    continue
+                # Only an explicit colon makes the label trustworthy
+                confidence = LABELED_CONFIDENCE if ":" in separator.group() else UNLABELED_CONFIDENCE
+                extracted[field] = (value, confidence)
         
         return extracted
 
-extractor = SimpleExtractor()
\ No newline at end of file
+@lru_cache(maxsize=256)
+def compile_matcher(fields: Tuple[str, ...]) -> FieldMatcher:
+    """Matcher for a schema, built once. Schemas are immutable, so the field tuple identifies one."""
+    return FieldMatcher(fields)
+
+STOPWORDS = {"a", "an", "and", "or", "of", "the", "to", "for", "in", "on", "with", "by", "is", "at"}
+_WORD = re.compile(r"[a-z0-9@\-]+")
+# Crude stemming so "allergies" / "allergic" / "allergy" meet; first match wins
+_SUFFIXES = ("ations", "ation", "ing", "ies", "ied", "ed", "ic", "is", "s", "es", "y")
+
+def _tokens(text: str) -> List[str]:
+    return _WORD.findall(text.lower().replace("_", " "))
+
+def _stem(token: str) -> str:
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 4:
+            return token[:-len(suffix)]
+    return token
+
+class FieldIndex:
+    """Inverted index from the words of each field's label to schema fields.
+    
+    Schemas are CSV headers, so a header's own words (including any
+    description in it, e.g. "Medications (current drugs)") are the only
+    vocabulary; words are matched by a shared crude stem.
+    """
+    
+    def __init__(self, fields: Tuple[str, ...]):
+        self.index: Dict[str, Set[str]] = {}
+        for field in fields:
+            for token in _tokens(field):
+                if token in STOPWORDS:
+                    continue
+                for word in {token, _stem(token)}:
+                    self.index.setdefault(word, set()).add(field)
+    
+    def mentioned(self, text: str) -> Set[str]:
+        """Fields the utterance lexically refers to."""
+        found: Set[str] = set()
+        for token in _tokens(text):
+            found.update(self.index.get(token, ()))
+            found.update(self.index.get(_stem(token), ()))
+        return found
+
+@lru_cache(maxsize=256)
+def build_field_index(fields: Tuple[str, ...]) -> FieldIndex:
+    """Field index for a schema, built once (keyed like `compile_matcher`)."""
+    return FieldIndex(fields)
+
+class SimpleExtractor:
+    """Regex extractor for structured values and filler detection."""
+    
+    def is_filler(self, text: str) -> bool:
+        """True if the utterance is empty or only filler ("okay", "let me check", ...)."""
+        return is_filler_text(text)
+    
+    def extract_with_confidence(self, text: str, fields: List[str]) -> Dict[str, Tuple[str, float]]:
+        """Extract {field: (value, confidence)} for fields the patterns can find."""
+        return compile_matcher(tuple(fields)).match(text)
+    
+    def mentioned_fields(self, text: str, fields: List[str]) -> Set[str]:
+        """Fields whose name or a synonym appears in the text."""
+        return build_field_index(tuple(fields)).mentioned(text)
+    
+    def extract_fields(self, text: str, fields: List[str]) -> Dict[str, str]:
+        return {field: value for field, (value, _) in self.extract_with_confidence(text, fields).items()}
+
+extractor = SimpleExtractor()
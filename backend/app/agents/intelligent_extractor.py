@@ -1,8 +1,15 @@
 import dspy
 import os
+import logging
+import asyncio
 from typing import Dict, List, Optional, Tuple
 from enum import Enum
 from app.config.settings import settings
+from app.services.llm_cache import LLMResponseCache
+from app.agents.confidence import field_confidence, token_logprobs
+from app.agents.streaming import FieldCallback, astream_fields
+
+logger = logging.getLogger(__name__)
 
 class ActionType(Enum):
     EXTRACT_FIELDS = "extract_fields"  # Extract fields AND store in memory
@@ -27,6 +34,86 @@ class FieldExtractor(dspy.Signature):
     context: str = dspy.InputField(desc="Additional context from conversation")
     
     value: str = dspy.OutputField(desc="Extracted field value or 'none' if not found")
+    confidence: float = dspy.OutputField(desc="Confidence from 0.0 to 1.0 that the value is correct and was actually stated")
+
+class BatchFieldExtractor(dspy.Signature):
+    """Extract values for several form fields from conversation text in a single pass."""
+    
+    text: str = dspy.InputField(desc="Conversation text to analyze")
+    field_names: List[str] = dspy.InputField(desc="Form fields to extract")
+    context: str = dspy.InputField(desc="Additional context from conversation")
+    
+    field_values: Dict[str, str] = dspy.OutputField(
+        desc="Map of every requested field name to its extracted value, or 'none' if not found"
+    )
+    field_confidences: Dict[str, float] = dspy.OutputField(
+        desc="Map of each extracted field name to a confidence from 0.0 to 1.0 that its value is correct"
+    )
+
+class DecideAndExtract(dspy.Signature):
+    """Decide what to do with the conversation text and, when it holds form data, extract it in the same pass."""
+    
+    conversation_history: str = dspy.InputField(desc="Previous conversation context")
+    current_text: str = dspy.InputField(desc="Current audio transcription")
+    schema_fields: List[str] = dspy.InputField(desc="Available form fields to fill")
+    
+    action_type: str = dspy.OutputField(desc="Action to take: extract_fields, store_context, or ignore")
+    field_values: Dict[str, str] = dspy.OutputField(
+        desc="If action_type is extract_fields, map of every form field to its value from the current text, "
+             "or 'none' if not found; otherwise an empty map"
+    )
+    field_confidences: Dict[str, float] = dspy.OutputField(
+        desc="Map of each extracted field name to a confidence from 0.0 to 1.0 that its value is correct"
+    )
+
+def uses_combined_call(field_count: int) -> bool:
+    """Whether `agent_mode` "combined" applies to a call over `field_count` fields.
+    
+    More fields than `extraction_max_fields_per_prompt` would make one
+    oversized prompt, so such calls fall back to two_step.
+    """
+    return settings.agent_mode == "combined" and field_count <= max(1, settings.extraction_max_fields_per_prompt)
+
+def build_predictor(signature: type, reasoning: Optional[str] = None) -> dspy.Module:
+    """ChainOfThought or plain Predict for a signature, per `agent_reasoning`."""
+    if (reasoning or settings.agent_reasoning) == "predict":
+        return dspy.Predict(signature)
+    return dspy.ChainOfThought(signature)
+
+class CachedPredictor(dspy.Module):
+    """Serves repeated calls with the same normalized inputs from the LLM cache."""
+    
+    def __init__(self, predictor: dspy.Module, cache: LLMResponseCache, signature_name: str):
+        super().__init__()
+        self.predictor = predictor
+        self.cache = cache
+        self.signature_name = signature_name
+    
+    def forward(self, **kwargs) -> dspy.Prediction:
+        key = self.cache.make_key(self.signature_name, **kwargs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return dspy.Prediction(**cached)
+        prediction = self.predictor(**kwargs)
+        self.cache.set(key, self._cacheable(prediction))
+        return prediction
+    
+    async def aforward(self, **kwargs) -> dspy.Prediction:
+        key = self.cache.make_key(self.signature_name, **kwargs)
+        cached = await self.cache.aget(key)
+        if cached is not None:
+            return dspy.Prediction(**cached)
+        prediction = await self.predictor.acall(**kwargs)
+        await self.cache.aset(key, self._cacheable(prediction))
+        return prediction
+    
+    @staticmethod
+    def _cacheable(prediction: dspy.Prediction) -> Dict:
+        value = prediction.toDict()
+        if "logprobs" in value:
+            # Provider logprob objects are not JSON; keep plain (token, logprob) pairs
+            value["logprobs"] = token_logprobs(value["logprobs"])
+        return value
 
 class IntelligentExtractor(dspy.Module):
     def __init__(self):
@@ -34,15 +121,42 @@ class IntelligentExtractor(dspy.Module):
         groq_lm = dspy.LM(
             "llama-3.3-70b-versatile", 
             api_key=settings.groq_api_key,
-            api_base="https://api.groq.com/openai/v1"
+            api_base="https://api.groq.com/openai/v1",
+            # Only some providers return logprobs; self-reported scores are used otherwise
+            **({"logprobs": True} if settings.llm_logprobs else {})
         )
         # Set the LM globally for DSPy
         dspy.configure(lm=groq_lm)
         
-        self.decide_action = dspy.ChainOfThought(AgentDecision)
-        self.extract_field = dspy.ChainOfThought(FieldExtractor)
+        # Repeated utterances (filler, repeated phrases) are answered from the cache
+        self.cache = LLMResponseCache.from_settings() if settings.llm_cache_enabled else None
+        
+        self.decide_action = self._cached(build_predictor(AgentDecision), "AgentDecision")
+        self.extract_field = self._cached(build_predictor(FieldExtractor), "FieldExtractor")
+        self.extract_fields = self._cached(build_predictor(BatchFieldExtractor), "BatchFieldExtractor")
+        # agent_mode="combined": one call decides and extracts
+        self.decide_and_extract = self._cached(build_predictor(DecideAndExtract), "DecideAndExtract")
+        
+        # Bounds the number of in-flight LLM calls made through aforward
+        self._semaphore = asyncio.Semaphore(max(1, settings.extraction_max_concurrency))
     
     def forward(self, text: str, fields: List[str], mem0_context: str = "") -> Dict:
+        if uses_combined_call(len(fields)):
+            prediction = self.decide_and_extract(
+                conversation_history=mem0_context,
+                current_text=text,
+                schema_fields=fields
+            )
+            result, failed = self._combined_result(fields, prediction)
+            if failed:
+                logger.info(f"Combined call left fields unparsed, extracting separately: {failed}")
+                if settings.extraction_mode == "batched":
+                    extracted = self.extract_batched(text, failed, mem0_context)
+                else:
+                    extracted = self.extract_per_field(text, failed, mem0_context)
+                self._merge_extracted(result, fields, extracted)
+            return result
+        
         # Make decision about what to do
         schema_fields_str = ", ".join(fields)
         decision = self.decide_action(
@@ -54,18 +168,286 @@ class IntelligentExtractor(dspy.Module):
         result = {
             "action_type": decision.action_type,
             "reasoning": decision.reasoning,
-            "extracted_fields": {}
+            "extracted_fields": {},
+            "confidences": {}
         }
         
         if decision.action_type == ActionType.EXTRACT_FIELDS.value:
             # Extract fields for schema AND store in memory
-            for field in fields:
-                extraction = self.extract_field(
+            if settings.extraction_mode == "batched":
+                extracted = self.extract_batched(text, fields, mem0_context)
+            else:
+                extracted = self.extract_per_field(text, fields, mem0_context)
+            self._split_confidences(result, extracted)
+        
+        return result
+    
+    async def aforward(
+        self, text: str, fields: List[str], mem0_context: str = "", on_field: Optional[FieldCallback] = None
+    ) -> Dict:
+        """Async counterpart of `forward` that never blocks the event loop.
+        
+        LLM calls are bounded by `extraction_max_concurrency` and each one is
+        limited to `extraction_call_timeout` seconds. With `on_field`, each
+        extracted value is reported as soon as the LLM has produced it; the
+        returned result is authoritative and may differ (see `astream_fields`).
+        """
+        if uses_combined_call(len(fields)):
+            return await self._aforward_combined(text, fields, mem0_context, on_field)
+        
+        schema_fields_str = ", ".join(fields)
+        try:
+            decision = await self._acall(
+                self.decide_action,
+                conversation_history=mem0_context,
+                current_text=text,
+                schema_fields=schema_fields_str
+            )
+        except Exception as e:
+            logger.warning(f"Agent decision failed, ignoring utterance: {e!r}")
+            return {
+                "action_type": ActionType.IGNORE.value,
+                "reasoning": f"Decision failed: {e!r}",
+                "extracted_fields": {},
+                "confidences": {}
+            }
+        
+        result = {
+            "action_type": decision.action_type,
+            "reasoning": decision.reasoning,
+            "extracted_fields": {},
+            "confidences": {}
+        }
+        
+        if decision.action_type == ActionType.EXTRACT_FIELDS.value:
+            self._split_confidences(result, await self.aextract(text, fields, mem0_context, on_field))
+        
+        return result
+    
+    async def _aforward_combined(
+        self, text: str, fields: List[str], mem0_context: str = "", on_field: Optional[FieldCallback] = None
+    ) -> Dict:
+        """Decide and extract with a single LLM call (DecideAndExtract)."""
+        try:
+            prediction = await self._acall(
+                self.decide_and_extract,
+                on_field=on_field,
+                stream_fields=fields,
+                conversation_history=mem0_context,
+                current_text=text,
+                schema_fields=fields
+            )
+        except Exception as e:
+            logger.warning(f"Combined decision failed, ignoring utterance: {e!r}")
+            return {
+                "action_type": ActionType.IGNORE.value,
+                "reasoning": f"Decision failed: {e!r}",
+                "extracted_fields": {},
+                "confidences": {}
+            }
+        
+        result, failed = self._combined_result(fields, prediction)
+        if failed:
+            logger.info(f"Combined call left fields unparsed, extracting separately: {failed}")
+            self._merge_extracted(result, fields, await self.aextract(text, failed, mem0_context, on_field))
+        return result
+    
+    def _combined_result(self, fields: List[str], prediction: dspy.Prediction) -> Tuple[Dict, List[str]]:
+        """Result dict from a DecideAndExtract prediction, plus fields whose values did not parse."""
+        result = {
+            "action_type": prediction.action_type,
+            "reasoning": getattr(prediction, "reasoning", "") or "",
+            "extracted_fields": {},
+            "confidences": {}
+        }
+        if prediction.action_type != ActionType.EXTRACT_FIELDS.value:
+            return result, []
+        extracted, failed = self._parse_batch(fields, prediction)
+        self._split_confidences(result, extracted)
+        return result, failed
+    
+    def _merge_extracted(self, result: Dict, fields: List[str], extracted: Dict[str, Tuple[str, float]]):
+        merged = {
+            **{field: (value, result["confidences"][field]) for field, value in result["extracted_fields"].items()},
+            **extracted
+        }
+        # Preserve schema order
+        self._split_confidences(result, {field: merged[field] for field in fields if field in merged})
+    
+    async def aextract(
+        self, text: str, fields: List[str], mem0_context: str = "", on_field: Optional[FieldCallback] = None
+    ) -> Dict[str, Tuple[str, float]]:
+        """Extract {field: (value, confidence)} without the action decision."""
+        if settings.extraction_mode == "batched":
+            return await self.aextract_batched(text, fields, mem0_context, on_field)
+        return await self.aextract_per_field(text, fields, mem0_context, on_field)
+    
+    def extract_per_field(self, text: str, fields: List[str], mem0_context: str = "") -> Dict[str, Tuple[str, float]]:
+        """Extract fields with one LLM call per field."""
+        extracted = {}
+        for field in fields:
+            extraction = self.extract_field(
+                text=text,
+                field_name=field,
+                context=mem0_context
+            )
+            if extraction.value.lower() != "none":
+                extracted[field] = self._scored(extraction.value, extraction, getattr(extraction, "confidence", None))
+        return extracted
+    
+    async def aextract_per_field(
+        self, text: str, fields: List[str], mem0_context: str = "", on_field: Optional[FieldCallback] = None
+    ) -> Dict[str, Tuple[str, float]]:
+        """Extract fields with one concurrent LLM call per field."""
+        async def extract_one(field: str) -> Optional[dspy.Prediction]:
+            try:
+                extraction = await self._acall(
+                    self.extract_field,
                     text=text,
                     field_name=field,
                     context=mem0_context
                 )
-                if extraction.value.lower() != "none":
-                    result["extracted_fields"][field] = extraction.value
+            except Exception as e:
+                logger.warning(f"Extraction failed for field '{field}': {e!r}")
+                return None
+            # Each call is its own field, so it is reported as soon as it returns
+            if on_field is not None and extraction.value.lower() != "none":
+                await on_field(field, extraction.value)
+            return extraction
+        
+        extractions = await asyncio.gather(*(extract_one(field) for field in fields))
+        return {
+            field: self._scored(extraction.value, extraction, getattr(extraction, "confidence", None))
+            for field, extraction in zip(fields, extractions)
+            if extraction is not None and extraction.value.lower() != "none"
+        }
+    
+    def extract_batched(self, text: str, fields: List[str], mem0_context: str = "") -> Dict[str, Tuple[str, float]]:
+        """Extract fields in chunks of up to `extraction_max_fields_per_prompt` per LLM call.
+        
+        Fields missing from (or unparseable in) a batched response fall back to
+        a per-field call.
+        """
+        extracted = {}
+        failed_fields = []
+        
+        for chunk in self._chunk_fields(fields):
+            try:
+                prediction = self.extract_fields(
+                    text=text,
+                    field_names=chunk,
+                    context=mem0_context
+                )
+            except Exception as e:
+                logger.warning(f"Batched extraction failed for {len(chunk)} fields: {e}")
+                prediction = None
+            
+            chunk_extracted, chunk_failed = self._parse_batch(chunk, prediction)
+            extracted.update(chunk_extracted)
+            failed_fields.extend(chunk_failed)
+        
+        if failed_fields:
+            logger.info(f"Falling back to per-field extraction for: {failed_fields}")
+            extracted.update(self.extract_per_field(text, failed_fields, mem0_context))
+        
+        # Preserve schema order
+        return {field: extracted[field] for field in fields if field in extracted}
+    
+    async def aextract_batched(
+        self, text: str, fields: List[str], mem0_context: str = "", on_field: Optional[FieldCallback] = None
+    ) -> Dict[str, Tuple[str, float]]:
+        """Async `extract_batched`: chunks run concurrently, then per-field fallback."""
+        async def extract_chunk(chunk: List[str]) -> Optional[dspy.Prediction]:
+            try:
+                return await self._acall(
+                    self.extract_fields,
+                    on_field=on_field,
+                    stream_fields=chunk,
+                    text=text,
+                    field_names=chunk,
+                    context=mem0_context
+                )
+            except Exception as e:
+                logger.warning(f"Batched extraction failed for {len(chunk)} fields: {e!r}")
+                return None
+        
+        chunks = self._chunk_fields(fields)
+        responses = await asyncio.gather(*(extract_chunk(chunk) for chunk in chunks))
+        
+        extracted = {}
+        failed_fields = []
+        for chunk, prediction in zip(chunks, responses):
+            chunk_extracted, chunk_failed = self._parse_batch(chunk, prediction)
+            extracted.update(chunk_extracted)
+            failed_fields.extend(chunk_failed)
+        
+        if failed_fields:
+            logger.info(f"Falling back to per-field extraction for: {failed_fields}")
+            extracted.update(await self.aextract_per_field(text, failed_fields, mem0_context, on_field))
+        
+        return {field: extracted[field] for field in fields if field in extracted}
+    
+    async def _acall(
+        self,
+        predictor: dspy.Module,
+        on_field: Optional[FieldCallback] = None,
+        stream_fields: Optional[List[str]] = None,
+        **kwargs
+    ) -> dspy.Prediction:
+        """Run a predictor asynchronously under the concurrency limit and call timeout.
+        
+        With `on_field`, the predictor's `field_values` output is streamed and
+        each completed value for `stream_fields` is reported as it arrives.
+        """
+        async with self._semaphore:
+            if on_field is None:
+                call = predictor.acall(**kwargs)
+            else:
+                call = astream_fields(predictor, "field_values", stream_fields or [], on_field, **kwargs)
+            return await asyncio.wait_for(call, timeout=settings.extraction_call_timeout)
+    
+    def _cached(self, predictor: dspy.Module, signature_name: str) -> dspy.Module:
+        if self.cache is None:
+            return predictor
+        return CachedPredictor(predictor, self.cache, signature_name)
+    
+    @staticmethod
+    def _chunk_fields(fields: List[str]) -> List[List[str]]:
+        chunk_size = max(1, settings.extraction_max_fields_per_prompt)
+        return [fields[i:i + chunk_size] for i in range(0, len(fields), chunk_size)]
+    
+    @staticmethod
+    def _scored(value: str, prediction: dspy.Prediction, reported) -> Tuple[str, float]:
+        """Pair a value with its confidence from logprobs or the self-reported score."""
+        return value, field_confidence(value, reported, getattr(prediction, "logprobs", None))
+    
+    @staticmethod
+    def _split_confidences(result: Dict, extracted: Dict[str, Tuple[str, float]]):
+        result["extracted_fields"] = {field: value for field, (value, _) in extracted.items()}
+        result["confidences"] = {field: confidence for field, (_, confidence) in extracted.items()}
+    
+    @classmethod
+    def _parse_batch(
+        cls, chunk: List[str], prediction: Optional[dspy.Prediction]
+    ) -> Tuple[Dict[str, Tuple[str, float]], List[str]]:
+        """Split a batched response into scored values and fields that failed to parse."""
+        values = getattr(prediction, "field_values", None)
+        if not isinstance(values, dict):
+            values = {}
+        confidences = getattr(prediction, "field_confidences", None)
+        if not isinstance(confidences, dict):
+            confidences = {}
         
-        return result
\ No newline at end of file
+        # Match returned keys case-insensitively against the requested fields
+        values_by_name = {str(k).strip().lower(): v for k, v in values.items()}
+        confidences_by_name = {str(k).strip().lower(): v for k, v in confidences.items()}
+        extracted = {}
+        failed = []
+        for field in chunk:
+            key = field.strip().lower()
+            value = values_by_name.get(key)
+            if not isinstance(value, str):
+                failed.append(field)
+            elif value.strip() and value.strip().lower() != "none":
+                extracted[field] = cls._scored(value.strip(), prediction, confidences_by_name.get(key))
+        return extracted, failed
\ No newline at end of file
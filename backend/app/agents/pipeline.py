@@ -0,0 +1,255 @@
+import logging
+import math
+import re
+from typing import Dict, List, Optional
+
+from app.agents.extractor import SimpleExtractor, extractor
+from app.agents.intelligent_extractor import IntelligentExtractor, ActionType, uses_combined_call
+from app.agents.streaming import FieldCallback
+from app.config.settings import settings
+from app.services.field_state import SessionFieldState
+
+logger = logging.getLogger(__name__)
+
+# Phrasing that marks an utterance as correcting an earlier value
+CORRECTION_CUE = re.compile(
+    r"\b(?:actually|i\s+meant|correction|scratch\s+that)\b|\bnot\b[^.;!?]{1,40}?\bbut\b",
+    re.IGNORECASE
+)
+
+class TieredExtractionPipeline:
+    """Rule-based fast path in front of the LLM agent.
+    
+    Tier 1 (SimpleExtractor) ignores filler utterances and takes
+    high-confidence structured values (email, phone, "field: value", ...).
+    Tier 2 (IntelligentExtractor) only runs for the fields tier 1 left open.
+    
+    Given the session's field state, tier 2 also skips fields that are
+    already settled unless the utterance mentions them, so its cost follows
+    the fields actually talked about rather than the schema size.
+    """
+    
+    def __init__(self, intelligent_extractor: IntelligentExtractor, rules: SimpleExtractor = extractor):
+        self.intelligent_extractor = intelligent_extractor
+        self.rules = rules
+        self.stats = {
+            "utterances": 0,
+            "filler_ignored": 0,   # Tier 1 only, no LLM call
+            "all_settled": 0,      # Every field settled and none mentioned, no LLM call
+            "rules_only": 0,       # Tier 1 filled every field, no LLM call
+            "rules_and_llm": 0,    # Tier 1 filled some fields, tier 2 the rest
+            "llm_only": 0,         # Tier 1 found nothing
+            "rule_fields": 0,      # Field values taken from tier 1
+            "llm_calls_saved": 0,  # LLM calls tier 2 would have made for the same input
+            "fields_skipped": 0,   # Settled, unmentioned fields kept out of tier 2
+            "fields_gated": 0,     # Values dropped for low confidence
+            "rechecks": 0,         # Idle re-checks of low-confidence fields
+            "fields_improved": 0,  # Re-checked fields whose confidence went up
+            "refinements": 0,      # Ambiguous utterances re-run with search context
+        }
+    
+    @staticmethod
+    def llm_calls_for(field_count: int) -> int:
+        """LLM round trips tier 2 makes for one utterance that extracts `field_count` fields."""
+        if field_count == 0 or uses_combined_call(field_count):
+            return 1  # Decision only, or decision and extraction in one call
+        if settings.extraction_mode == "batched":
+            return 1 + math.ceil(field_count / max(1, settings.extraction_max_fields_per_prompt))
+        return 1 + field_count
+    
+    async def aforward(
+        self,
+        text: str,
+        fields: List[str],
+        mem0_context: str = "",
+        state: Optional[SessionFieldState] = None,
+        on_field: Optional[FieldCallback] = None
+    ) -> Dict:
+        """Run both tiers. The result carries a per-field "confidences" map next to "extracted_fields".
+        
+        `on_field` is called with each value as soon as it is known: rule
+        values before the LLM runs, LLM values while they stream. Values the
+        gate later drops are absent from the result, which is authoritative.
+        """
+        self.stats["utterances"] += 1
+        if not settings.rule_tier_enabled:
+            remaining = self._llm_fields(text, fields, state)
+            if not remaining:
+                return self._nothing_to_ask()
+            self.stats["llm_only"] += 1
+            return self._gate(
+                await self.intelligent_extractor.aforward(text, remaining, mem0_context, on_field),
+                state,
+                text
+            )
+        
+        # Tier 1a: filler never reaches the LLM
+        if self.rules.is_filler(text):
+            self._record("filler_ignored", saved=self.llm_calls_for(0))
+            return {
+                "action_type": ActionType.IGNORE.value,
+                "reasoning": "Filler utterance (rule tier)",
+                "extracted_fields": {},
+                "confidences": {},
+                "tier": "rules"
+            }
+        
+        # Tier 1b: high-confidence structured values, gated like LLM values
+        rule_matches = {
+            field: match
+            for field, match in self.rules.extract_with_confidence(text, fields).items()
+            if match[1] >= settings.rule_min_confidence
+        }
+        rule_result = self._gate({
+            "extracted_fields": {field: value for field, (value, _) in rule_matches.items()},
+            "confidences": {field: confidence for field, (_, confidence) in rule_matches.items()},
+        }, state, text)
+        rule_values = rule_result["extracted_fields"]
+        rule_confidences = rule_result["confidences"]
+        self.stats["rule_fields"] += len(rule_values)
+        remaining = self._llm_fields(text, [field for field in fields if field not in rule_values], state)
+        
+        if rule_values and not remaining:
+            self._record("rules_only", saved=self.llm_calls_for(len(fields)))
+            return {
+                "action_type": ActionType.EXTRACT_FIELDS.value,
+                "reasoning": "All fields matched by rule tier",
+                "extracted_fields": rule_values,
+                "confidences": rule_confidences,
+                "tier": "rules"
+            }
+        if not remaining:
+            return self._nothing_to_ask()
+        
+        # Tier 2: the LLM handles whatever is left
+        if on_field is not None:
+            for field, value in rule_values.items():
+                await on_field(field, value)
+        result = self._gate(
+            await self.intelligent_extractor.aforward(text, remaining, mem0_context, on_field), state, text
+        )
+        if not rule_values:
+            self._record("llm_only", saved=0)
+            result["tier"] = "llm"
+            return result
+        
+        self._record("rules_and_llm", saved=self.llm_calls_for(len(fields)) - self.llm_calls_for(len(remaining)))
+        extracted = {**rule_values, **result["extracted_fields"]}
+        result["action_type"] = ActionType.EXTRACT_FIELDS.value
+        result["extracted_fields"] = {field: extracted[field] for field in fields if field in extracted}
+        result["confidences"] = {**result["confidences"], **rule_confidences}
+        result["tier"] = "rules+llm"
+        return result
+    
+    async def arefine(
+        self,
+        text: str,
+        fields: List[str],
+        mem0_context: str,
+        state: Optional[SessionFieldState] = None
+    ) -> Dict:
+        """Second LLM pass over an utterance already counted by `aforward`, with more context."""
+        remaining = self._llm_fields(text, fields, state)
+        if not remaining:
+            return self._nothing_to_ask()
+        self.stats["refinements"] += 1
+        return self._gate(
+            await self.intelligent_extractor.aforward(text, remaining, mem0_context),
+            state,
+            text
+        )
+    
+    @staticmethod
+    def is_ambiguous(result: Dict) -> bool:
+        """Whether an LLM decision might change with more context.
+        
+        True for unrecognized actions and for extract decisions that found nothing.
+        Decisions made without the LLM (filler, every field settled) are final.
+        """
+        if result.get("tier") == "rules":
+            return False
+        action = result["action_type"]
+        if action not in {action_type.value for action_type in ActionType}:
+            return True
+        return action == ActionType.EXTRACT_FIELDS.value and not result["extracted_fields"]
+    
+    def _llm_fields(self, text: str, fields: List[str], state: Optional[SessionFieldState]) -> List[str]:
+        """Fields worth asking the LLM about: open ones, plus settled ones the utterance mentions."""
+        if state is None or not settings.field_skip_enabled:
+            return fields
+        mentioned = self.rules.mentioned_fields(text, fields)
+        selected = [field for field in fields if field in mentioned or not state.is_settled(field)]
+        skipped = len(fields) - len(selected)
+        if skipped:
+            self.stats["fields_skipped"] += skipped
+            logger.info(f"⏭️ Skipping {skipped} settled field(s) not mentioned in the utterance")
+        return selected
+    
+    async def arecheck(self, fields: List[str], state: SessionFieldState) -> Dict:
+        """Re-extract the session's low-confidence fields from its recent transcript.
+        
+        Meant for idle time. All such fields go out in one batched extraction,
+        and only values that come back more confident than before are returned.
+        """
+        low = state.low_confidence_fields(fields)
+        if not low or not state.transcript:
+            return {"extracted_fields": {}, "confidences": {}}
+        
+        self.stats["rechecks"] += 1
+        extracted = await self.intelligent_extractor.aextract(" ".join(state.transcript), low)
+        improved = {
+            field: (value, confidence)
+            for field, (value, confidence) in extracted.items()
+            if confidence > (state.confidence(field) or 0.0)
+        }
+        self.stats["fields_improved"] += len(improved)
+        logger.info(f"🔁 RE-CHECK: {len(low)} low-confidence field(s), {len(improved)} improved")
+        return {
+            "extracted_fields": {field: value for field, (value, _) in improved.items()},
+            "confidences": {field: confidence for field, (_, confidence) in improved.items()},
+        }
+    
+    def _gate(self, result: Dict, state: Optional[SessionFieldState], text: str = "") -> Dict:
+        """Drop values that are too uncertain, or less certain than what the session already has.
+        
+        The second check is waived for corrections: a changed value replaces
+        the stored one even at lower confidence if the utterance names the
+        field ("my name is Jon") or uses a correction cue ("actually, Jon").
+        """
+        kept = {}
+        for field, value in result["extracted_fields"].items():
+            confidence = result["confidences"].get(field, settings.llm_field_confidence)
+            previous = state.confidence(field) if state is not None else None
+            if previous is not None and self._is_correction(field, value, state, text):
+                previous = None
+            if confidence < settings.field_min_confidence or (previous is not None and confidence < previous):
+                self.stats["fields_gated"] += 1
+                logger.info(f"🚧 Dropping '{field}' = '{value}' (confidence {confidence:.2f}, previous {previous})")
+                continue
+            kept[field] = value
+        result["confidences"] = {field: result["confidences"].get(field, settings.llm_field_confidence) for field in kept}
+        result["extracted_fields"] = kept
+        return result
+    
+    def _is_correction(self, field: str, value: str, state: SessionFieldState, text: str) -> bool:
+        stored = state.fields.get(field)
+        if stored is None or stored.value.strip().lower() == value.strip().lower():
+            return False
+        # A value merely appearing in the text is not enough: LLM values almost always do
+        return CORRECTION_CUE.search(text) is not None or field in self.rules.mentioned_fields(text, [field])
+    
+    def _nothing_to_ask(self) -> Dict:
+        """Result for an utterance that leaves no field to extract: kept as context only."""
+        self._record("all_settled", saved=self.llm_calls_for(0))
+        return {
+            "action_type": ActionType.STORE_CONTEXT.value,
+            "reasoning": "Every field is settled and none is mentioned (rule tier)",
+            "extracted_fields": {},
+            "confidences": {},
+            "tier": "rules"
+        }
+    
+    def _record(self, decision: str, saved: int):
+        self.stats[decision] += 1
+        self.stats["llm_calls_saved"] += saved
+        logger.info(f"⚡ EXTRACTION TIER: {decision} (LLM calls saved: {saved}, total: {self.stats['llm_calls_saved']})")
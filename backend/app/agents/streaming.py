@@ -0,0 +1,87 @@
+"""Token streaming of field maps from DSPy predictors.
+
+`astream_fields` runs a predictor through `dspy.streamify` with a
+`StreamListener` on its dict-valued output field (e.g. `field_values`) and
+feeds the streamed JSON text to a `FieldStreamParser`, which reports each
+"field": "value" pair as soon as its closing quote and separator arrive. The
+final prediction is returned as usual, so callers can reconcile what was
+streamed with the parsed result.
+"""
+
+import json
+import logging
+import re
+from typing import Awaitable, Callable, Collection, Dict, List, Tuple
+
+import dspy
+from dspy.streaming import StreamListener, StreamResponse
+
+logger = logging.getLogger(__name__)
+
+FieldCallback = Callable[[str, str], Awaitable[None]]
+
+# A complete "key": "value" pair, terminated by the next pair or the end of the map
+_PAIR = re.compile(r'"((?:[^"\\]|\\.)*)"\s*:\s*"((?:[^"\\]|\\.)*)"\s*[,}]')
+
+
+class FieldStreamParser:
+    """Incrementally extracts completed string pairs from a streamed JSON object."""
+
+    def __init__(self, fields: Collection[str]):
+        self._fields = {field.strip().lower(): field for field in fields}
+        self._buffer = ""
+        self._position = 0
+        self.seen: Dict[str, str] = {}
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        """Add streamed text; return (field, value) pairs completed by it."""
+        self._buffer += text
+        completed = []
+        for match in _PAIR.finditer(self._buffer, self._position):
+            # Resume after the value, not the separator: "}" may close the map
+            self._position = match.end(2) + 1
+            try:
+                key = json.loads(f'"{match.group(1)}"')
+                value = json.loads(f'"{match.group(2)}"').strip()
+            except ValueError:
+                continue
+            field = self._fields.get(key.strip().lower())
+            if field is None or field in self.seen:
+                continue
+            if not value or value.lower() == "none":
+                continue
+            self.seen[field] = value
+            completed.append((field, value))
+        return completed
+
+
+def inner_predict(module: dspy.Module) -> dspy.Predict:
+    """The `dspy.Predict` that actually calls the LM inside a (wrapped) predictor."""
+    while not isinstance(module, dspy.Predict):
+        module = getattr(module, "predictor", None) or getattr(module, "predict")
+    return module
+
+
+async def astream_fields(
+    predictor: dspy.Module,
+    field_name: str,
+    fields: Collection[str],
+    on_field: FieldCallback,
+    **kwargs
+) -> dspy.Prediction:
+    """Call `predictor` with streaming, invoking `on_field` for each completed field value."""
+    predict = inner_predict(predictor)
+    listener = StreamListener(signature_field_name=field_name, predict=predict, predict_name=field_name)
+    program = dspy.streamify(predictor, stream_listeners=[listener], is_async_program=True)
+    parser = FieldStreamParser(fields)
+
+    prediction = None
+    async for chunk in program(**kwargs):
+        if isinstance(chunk, StreamResponse):
+            for field, value in parser.feed(chunk.chunk):
+                await on_field(field, value)
+        elif isinstance(chunk, dspy.Prediction):
+            prediction = chunk
+    if prediction is None:
+        raise RuntimeError("Streaming call finished without a prediction")
+    return prediction
@@ -1,11 +1,15 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
-import base64
 import logging
 from datetime import datetime
 from app.services.groq_transcription import GroqTranscriptionService
-from app.agents.intelligent_extractor import IntelligentExtractor, ActionType
+from app.agents.intelligent_extractor import ActionType
+from app.agents.pipeline import TieredExtractionPipeline
 from app.services.mem0_memory import Mem0MemoryService
+from app.services.audio_io import decode_audio_payload
+from app.services.field_state import SessionFieldState
+from app.services.session_store import upsert_session_fields
+from app.services.registry import get_pipeline, get_memory, get_transcription
 from app.database import async_session, Session, Schema
 
 logger = logging.getLogger(__name__)
@@ -21,10 +25,16 @@ class AudioChunkResponse(BaseModel):
     transcription: str = None
     action: str = None
     extracted_fields: dict = {}
+    confidences: dict = {}
     message: str = None
 
 @router.post("/chunk", response_model=AudioChunkResponse)
-async def process_audio_chunk(request: AudioChunkRequest):
+async def process_audio_chunk(
+    request: AudioChunkRequest,
+    transcription_service: GroqTranscriptionService = Depends(get_transcription),
+    mem0_service: Mem0MemoryService = Depends(get_memory),
+    pipeline: TieredExtractionPipeline = Depends(get_pipeline)
+):
     """
     Process audio chunk - same as WebSocket but via REST API.
     """
@@ -35,7 +45,7 @@ async def process_audio_chunk(request: AudioChunkRequest):
     
     # Decode base64 audio data
     try:
-        audio_bytes = base64.b64decode(audio_data)
+        audio_bytes = decode_audio_payload(audio_data)
         logger.info(f"[{datetime.now().isoformat()}] Decoded audio size: {len(audio_bytes)} bytes")
     except Exception as e:
         logger.error(f"[{datetime.now().isoformat()}] Failed to decode audio: {str(e)}")
@@ -54,7 +64,6 @@ async def process_audio_chunk(request: AudioChunkRequest):
         fields = schema.fields
     
     # Transcribe audio using Groq Whisper
-    transcription_service = GroqTranscriptionService()
     text = await transcription_service.transcribe_audio_chunk(audio_bytes)
     
     if not text:
@@ -66,21 +75,22 @@ async def process_audio_chunk(request: AudioChunkRequest):
     
     logger.info(f"🎤 TRANSCRIPTION: '{text}'")
     
-    # Get conversation memory from Mem0
-    mem0_service = Mem0MemoryService()
-    context = await mem0_service.get_relevant_context(text, str(session_id))
+    # Known values come from the session's field store; Mem0 adds conversation context
+    state = await SessionFieldState.load(session_id)
+    context = state.agent_context(fields, await mem0_service.get_relevant_context(text, str(session_id)))
     
-    # Run intelligent agent
-    intelligent_extractor = IntelligentExtractor()
-    result = intelligent_extractor.forward(text, fields, context)
+    # Run tiered extraction: rule-based fast path, then the intelligent agent
+    result = await pipeline.aforward(text, fields, context, state=state)
     
     # Log agent action
     action = result['action_type']
     extracted_fields = {}
+    confidences = {}
     
     if action == ActionType.EXTRACT_FIELDS.value:
         logger.info(f"🤖 AGENT ACTION: Extract Fields - {result.get('extracted_fields', {})}")
         extracted_fields = result.get('extracted_fields', {})
+        confidences = result.get('confidences', {})
     elif action == ActionType.STORE_CONTEXT.value:
         logger.info(f"🤖 AGENT ACTION: Store Context for future reference")
     else:
@@ -95,15 +105,14 @@ async def process_audio_chunk(request: AudioChunkRequest):
             action_taken=result["action_type"],
             extracted_fields=result["extracted_fields"]
         )
+        # All of the utterance's field values in one batched write
+        await mem0_service.update_field_memories(str(session_id), result["extracted_fields"])
         
-        # Store individual field extractions
         for field, field_value in result["extracted_fields"].items():
-            await mem0_service.update_field_memory(
-                session_id=str(session_id),
-                field_name=field,
-                field_value=field_value
-            )
             logger.info(f"✅ FIELD UPDATE: {field} = '{field_value}'")
+        
+        # Keep the field store current, as the WebSocket path does
+        await upsert_session_fields(session_id, result["extracted_fields"], result["confidences"])
     
     elif result["action_type"] == ActionType.STORE_CONTEXT.value:
         # Store context for future reference
@@ -118,5 +127,6 @@ async def process_audio_chunk(request: AudioChunkRequest):
         transcription=text,
         action=action,
         extracted_fields=extracted_fields,
+        confidences=confidences,
         message="Audio processed successfully"
     )
\ No newline at end of file
@@ -1,12 +1,79 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import StreamingResponse
-from app.database import async_session, Session, Schema, SessionData
-from sqlalchemy import select
-import pandas as pd
-from io import StringIO
+from app.database import async_session, Session, Schema, SessionFieldValue
+from app.services.exporter import (
+    iter_session_values, stream_csv, session_criteria, resolve_export_fields,
+    iter_bulk_rows, stream_ndjson, stream_columnar
+)
+from datetime import datetime
+from typing import Optional
 
 router = APIRouter()
 
+BULK_FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+@router.get("/bulk")
+async def export_bulk(
+    schema_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    format: str = Query("parquet", pattern="^(parquet|arrow|ndjson)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of schema fields")
+):
+    """
+    Export many sessions in one streamed response, selected by schema and/or
+    creation date range ([start, end)). Columns are the session metadata
+    followed by the schema's fields.
+    """
+    if not schema_id and not start and not end:
+        raise HTTPException(status_code=400, detail="Provide a schema_id or a start/end date range")
+    
+    criteria = session_criteria(schema_id, start, end)
+    
+    if schema_id:
+        async with async_session() as db:
+            schema = await db.get(Schema, schema_id)
+            if not schema:
+                raise HTTPException(status_code=404, detail="Schema not found")
+            export_fields = list(schema.fields)
+    else:
+        export_fields = await resolve_export_fields(criteria)
+    
+    # Column projection
+    if fields:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in requested if f not in export_fields]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {unknown}")
+        export_fields = requested
+    
+    rows = iter_bulk_rows(criteria, export_fields)
+    if format == "ndjson":
+        body = stream_ndjson(rows)
+    else:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(
+                status_code=501,
+                detail="Parquet/Arrow export requires pyarrow (install the 'analytics' extra)"
+            )
+        body = stream_columnar(rows, export_fields, format)
+    
+    media_type, extension = BULK_FORMATS[format]
+    filename = f"{schema_id or 'sessions'}.{extension}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}"
+        }
+    )
+
 @router.get("/{session_id}/csv")
 async def export_csv(session_id: str):
     async with async_session() as db:
@@ -16,34 +83,14 @@ async def export_csv(session_id: str):
             raise HTTPException(status_code=404, detail="Session not found")
         
         schema = await db.get(Schema, session.schema_id)
-        
-        # Get all data for session
-        result = await db.execute(
-            select(SessionData).where(SessionData.session_id == session_id)
-        )
-        data_rows = result.scalars().all()
-        
-        # Create DataFrame
-        if data_rows:
-            df = pd.DataFrame([row.data for row in data_rows])
-            # Ensure all schema fields are present
-            for field in schema.fields:
-                if field not in df.columns:
-                    df[field] = ""
-            df = df[schema.fields]  # Reorder columns
-        else:
-            # Empty DataFrame with schema columns
-            df = pd.DataFrame(columns=schema.fields)
-        
-        # Convert to CSV
-        output = StringIO()
-        df.to_csv(output, index=False)
-        output.seek(0)
-        
-        return StreamingResponse(
-            iter([output.getvalue()]),
-            media_type="text/csv",
-            headers={
-                "Content-Disposition": f"attachment; filename={session.name}.csv"
-            }
-        )
\ No newline at end of file
+    
+    # Stream rows straight from the database cursor through the csv module
+    rows = iter_session_values(SessionFieldValue.session_id == session_id)
+    
+    return StreamingResponse(
+        stream_csv(schema.fields, rows),
+        media_type="text/csv",
+        headers={
+            "Content-Disposition": f"attachment; filename={session.name}.csv"
+        }
+    )
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
-from app.database import async_session, Session, Schema, SessionData
+from app.database import async_session, Session, Schema
 from app.models.schema import SessionCreate, SessionResponse
+from app.services.session_store import get_session_values
 from sqlalchemy import select
 from typing import List
 
@@ -47,16 +48,13 @@ async def get_session(session_id: str):
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         
-        # Get session data
-        result = await db.execute(
-            select(SessionData).where(SessionData.session_id == session_id)
-        )
-        data = result.scalars().all()
-        
-        return {
-            "id": session.id,
-            "schema_id": session.schema_id,
-            "name": session.name,
-            "data": [d.data for d in data],
-            "created_at": session.created_at
-        }
\ No newline at end of file
+    # Current field values for the session
+    values = await get_session_values(session_id)
+    
+    return {
+        "id": session.id,
+        "schema_id": session.schema_id,
+        "name": session.name,
+        "data": [values] if values else [],
+        "created_at": session.created_at
+    }
\ No newline at end of file
@@ -1,14 +1,21 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from app.database import async_session, Session, Schema, SessionData
-from app.agents.extractor import extractor
-from app.agents.intelligent_extractor import IntelligentExtractor, ActionType
-from app.services.groq_transcription import GroqTranscriptionService
-from app.services.mem0_memory import Mem0MemoryService
-from typing import Dict, List
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
+from app.database import async_session, Session, Schema
+from app.services.session_store import upsert_session_fields
+from app.services.field_state import SessionFieldState
+from app.agents.intelligent_extractor import ActionType
+from app.agents.pipeline import TieredExtractionPipeline
+from app.agents.streaming import FieldCallback
+from app.services.registry import ServiceRegistry, get_services
+from app.services.audio_segmenter import AudioSegmenter
+from app.services.audio_io import AudioPayload, decode_audio_payload, payload_size
+from app.services.session_queue import SessionWorkQueue, WorkItem, QueueFullPolicy
+from app.services.socket_sender import SocketSender
+from app.config.settings import settings
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
 import json
-import base64
+import orjson
 from datetime import datetime
-from sqlalchemy import select
 import logging
 
 # Logging configuration
@@ -22,70 +29,152 @@ logger.setLevel(logging.INFO)
 router = APIRouter()
 
 class ConnectionManager:
+    """Fans messages out to every socket of a session through per-socket send queues."""
+    
     def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+        self.active_connections: Dict[str, List[SocketSender]] = {}
+        self.stats = {"messages": 0, "evicted": 0}
 
     async def connect(self, websocket: WebSocket, session_id: str):
         await websocket.accept()
+        sender = SocketSender(
+            websocket,
+            maxsize=settings.ws_send_queue_size,
+            send_timeout=settings.ws_send_timeout,
+            max_batch=settings.ws_max_batch_fields,
+            on_evict=lambda sender, reason: self._evicted(sender, session_id, reason),
+            name=session_id
+        )
+        sender.start()
         if session_id not in self.active_connections:
             self.active_connections[session_id] = []
-        self.active_connections[session_id].append(websocket)
+        self.active_connections[session_id].append(sender)
 
     def disconnect(self, websocket: WebSocket, session_id: str):
-        if session_id in self.active_connections:
-            self.active_connections[session_id].remove(websocket)
-            if not self.active_connections[session_id]:
-                del self.active_connections[session_id]
+        for sender in self.active_connections.get(session_id, []):
+            if sender.websocket is websocket:
+                sender.close()
+                self._remove(sender, session_id)
+                return
+
+    def _remove(self, sender: SocketSender, session_id: str):
+        connections = self.active_connections.get(session_id)
+        if connections is None or sender not in connections:
+            return
+        connections.remove(sender)
+        if not connections:
+            del self.active_connections[session_id]
+
+    def _evicted(self, sender: SocketSender, session_id: str, reason: str):
+        # Slow or dead sockets are dropped so the rest of the session keeps receiving
+        self.stats["evicted"] += 1
+        logger.warning(f"[{datetime.now().isoformat()}] Evicted connection from session {session_id}: {reason}")
+        self._remove(sender, session_id)
+
+    def _broadcast(self, session_id: str, payload: Dict, field: Optional[str] = None):
+        """Serialize once and queue on every socket; never waits on the network"""
+        connections = self.active_connections.get(session_id)
+        if not connections:
+            return
+        message = orjson.dumps(payload).decode()
+        self.stats["messages"] += 1
+        for sender in list(connections):
+            # A sender that overflows evicts itself from the session
+            sender.send(message, field)
 
-    async def send_field_update(self, session_id: str, field: str, value: str):
+    async def send_field_update(
+        self, session_id: str, field: str, value: str, confidence: Optional[float] = None, partial: bool = False
+    ):
         """Send real-time field update to React frontend"""
-        if session_id in self.active_connections:
-            message = json.dumps({
-                "type": "field_update",
-                "field": field,
-                "value": value,
-                "timestamp": datetime.now().isoformat()
-            })
-            for connection in self.active_connections[session_id]:
-                try:
-                    await connection.send_text(message)
-                except Exception as e:
-                    # Handle disconnected clients
-                    logger.warning(f"[{datetime.now().isoformat()}] Failed to send to connection: {str(e)}")
+        payload = {
+            "type": "field_update",
+            "field": field,
+            "value": value,
+            "timestamp": datetime.now().isoformat()
+        }
+        if confidence is not None:
+            payload["confidence"] = confidence
+        if partial:
+            # Streamed before extraction finished; a field_reconcile follows
+            payload["partial"] = True
+        # Queued field updates are coalesced into one field_updates frame per socket
+        self._broadcast(session_id, payload, field=field)
+
+    async def send_field_reconcile(self, session_id: str, fields: Dict[str, str], confidences: Dict[str, Optional[float]]):
+        """Send the final values of every field an utterance touched, replacing streamed partials"""
+        self._broadcast(session_id, {
+            "type": "field_reconcile",
+            "fields": fields,
+            "confidences": confidences,
+            "timestamp": datetime.now().isoformat()
+        })
 
-    async def send_status(self, session_id: str, status: str, message: str = ""):
+    async def send_status(self, session_id: str, status: str, message: str = "", queue_depth: Optional[int] = None):
         """Send processing status updates"""
-        if session_id in self.active_connections:
-            msg = json.dumps({
-                "type": "status",
-                "status": status,  # "processing", "ready", "error"
-                "message": message,
-                "timestamp": datetime.now().isoformat()
-            })
-            for connection in self.active_connections[session_id]:
-                try:
-                    await connection.send_text(msg)
-                except Exception as e:
-                    logger.warning(f"[{datetime.now().isoformat()}] Failed to send status: {str(e)}")
+        payload = {
+            "type": "status",
+            "status": status,  # "processing", "ready", "error", "queued"
+            "message": message,
+            "timestamp": datetime.now().isoformat()
+        }
+        if queue_depth is not None:
+            payload["queue_depth"] = queue_depth
+        self._broadcast(session_id, payload)
     
     async def send_transcription(self, session_id: str, text: str):
         """Send transcribed text to frontend for display"""
-        if session_id in self.active_connections:
-            message = json.dumps({
-                "type": "transcription",
-                "text": text,
-                "timestamp": datetime.now().isoformat()
-            })
-            for connection in self.active_connections[session_id]:
-                try:
-                    await connection.send_text(message)
-                except Exception as e:
-                    logger.warning(f"Failed to send transcription: {str(e)}")
+        self._broadcast(session_id, {
+            "type": "transcription",
+            "text": text,
+            "timestamp": datetime.now().isoformat()
+        })
 
 manager = ConnectionManager()
 
+class FieldStream:
+    """Pushes an utterance's field values while they are extracted, then reconciles them with the result."""
+    
+    def __init__(self, session_id: str, state: Optional[SessionFieldState] = None):
+        self.session_id = session_id
+        self.state = state
+        self.streamed: Dict[str, str] = {}
+    
+    @property
+    def on_field(self) -> Optional[FieldCallback]:
+        return self.push if settings.stream_field_updates else None
+    
+    async def push(self, field: str, value: str):
+        if self.streamed.get(field) == value:
+            return
+        self.streamed[field] = value
+        logger.info(f"📡 PARTIAL FIELD: {field} = '{value}'")
+        await manager.send_field_update(self.session_id, field, value, partial=True)
+    
+    async def reconcile(self, result: Dict):
+        """Send the final values, reverting streamed fields the result dropped.
+        
+        Must run before the session state is updated with `result`, since
+        reverted fields fall back to their previous value.
+        """
+        extracted = result["extracted_fields"] if result["action_type"] == ActionType.EXTRACT_FIELDS.value else {}
+        fields = dict(extracted)
+        confidences = {field: result["confidences"].get(field) for field in extracted}
+        for field in self.streamed:
+            if field in extracted:
+                continue
+            previous = self.state.fields.get(field) if self.state is not None else None
+            fields[field] = previous.value if previous is not None else ""
+            confidences[field] = previous.confidence if previous is not None else None
+            logger.info(f"↩️ REVERTING streamed field '{field}' to '{fields[field]}'")
+        if fields:
+            await manager.send_field_reconcile(self.session_id, fields, confidences)
+
 @router.websocket("/ws/session/{session_id}")
-async def websocket_session(websocket: WebSocket, session_id: str):
+async def websocket_session(
+    websocket: WebSocket,
+    session_id: str,
+    services: ServiceRegistry = Depends(get_services)
+):
     logger.info(f"[{datetime.now().isoformat()}] WebSocket connection initiated for session: {session_id}")
     await manager.connect(websocket, session_id)
     
@@ -94,12 +183,73 @@ async def websocket_session(websocket: WebSocket, session_id: str):
         session = await db.get(Session, session_id)
         if not session:
             logger.warning(f"[{datetime.now().isoformat()}] Session not found: {session_id}")
+            manager.disconnect(websocket, session_id)
             await websocket.close(code=4004, reason="Session not found")
             return
         
         schema = await db.get(Schema, session.schema_id)
         logger.info(f"[{datetime.now().isoformat()}] Session verified, schema fields: {schema.fields}")
     
+    # What this session has already filled, so settled fields are not re-extracted
+    field_state = await SessionFieldState.load(session_id)
+    
+    # Per-session buffer-until-silence segmenter, started on the first binary packet
+    segmenter = None
+    segmentation_enabled = settings.audio_segmentation_enabled
+    
+    # Refinements in flight; awaited when the session ends
+    refinements: Set[asyncio.Task] = set()
+    
+    # Work is processed in order by a dedicated worker so the receive loop never blocks
+    async def handle_work_item(item: WorkItem):
+        processed = None
+        if item.kind == "audio":
+            processed = await process_audio_chunk(
+                session_id, item.payload, schema.fields, services, filename=item.filename, state=field_state
+            )
+        elif item.kind == "text":
+            processed = await process_text_chunk(session_id, item.payload, schema.fields, services, state=field_state)
+        elif item.kind == "stop":
+            await manager.send_status(session_id, "stopped", "Recording stopped")
+        
+        # Ambiguous decisions get a second pass with semantic-search context once
+        # the fast result is out. It runs beside the queue so the next utterance
+        # is not held up; values set meanwhile are newer and win over it.
+        if settings.context_refinement_enabled and processed is not None:
+            text, result = processed
+            if TieredExtractionPipeline.is_ambiguous(result):
+                logger.info(f"🔎 Ambiguous decision, refining: '{text}'")
+                refinement = asyncio.create_task(refine_utterance(
+                    session_id, text, schema.fields, services, field_state, baseline=dict(field_state.fields)
+                ))
+                refinements.add(refinement)
+                refinement.add_done_callback(refinements.discard)
+    
+    # Once the session goes quiet, low-confidence fields get a second look
+    async def recheck_when_idle():
+        await recheck_fields(session_id, schema.fields, services, field_state)
+    
+    work_queue = SessionWorkQueue(
+        handle_work_item,
+        maxsize=settings.session_queue_maxsize,
+        policy=QueueFullPolicy(settings.session_queue_policy),
+        name=session_id,
+        on_idle=recheck_when_idle if settings.recheck_enabled else None,
+        idle_after=settings.recheck_idle_seconds
+    )
+    work_queue.start()
+    
+    async def enqueue(item: WorkItem):
+        accepted = work_queue.submit(item)
+        if not accepted:
+            await manager.send_status(
+                session_id, "error", f"Server busy, {item.kind} input dropped", queue_depth=work_queue.depth
+            )
+        elif work_queue.depth > 1:
+            await manager.send_status(
+                session_id, "queued", f"{work_queue.depth} items waiting", queue_depth=work_queue.depth
+            )
+    
     try:
         await manager.send_status(session_id, "ready", "Connected and ready for audio/text")
         logger.info(f"[{datetime.now().isoformat()}] WebSocket ready, waiting for data...")
@@ -130,12 +280,26 @@ async def websocket_session(websocket: WebSocket, session_id: str):
                 logger.info(f"[{datetime.now().isoformat()}] PACKET #{packet_count} RECEIVED!")
                 logger.info(f"Session ID: {session_id}")
                 logger.info(f"Binary audio data: {len(audio_bytes)} bytes")
-                logger.info(f"Processing binary audio chunk...")
                 
-                # Convert to base64 for existing process_audio_chunk function
-                import base64
-                audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-                await process_audio_chunk(session_id, audio_base64, schema.fields)
+                if segmentation_enabled and segmenter is None:
+                    try:
+                        segmenter = await AudioSegmenter.create()
+                    except FileNotFoundError:
+                        logger.error(
+                            f"ffmpeg not found at '{settings.ffmpeg_path}', "
+                            "falling back to per-packet transcription"
+                        )
+                        segmentation_enabled = False
+                
+                if segmenter is not None:
+                    # Buffer until silence; only complete utterances are transcribed
+                    for utterance in await segmenter.feed(audio_bytes):
+                        logger.info(f"Queueing utterance ({payload_size(utterance)} bytes)...")
+                        await enqueue(WorkItem("audio", utterance, filename="utterance.wav"))
+                else:
+                    logger.info(f"Queueing binary audio chunk...")
+                    # Raw bytes go straight through; no base64 round trip
+                    await enqueue(WorkItem("audio", audio_bytes))
                 logger.info(f"{'='*80}\n")
                 continue
             else:
@@ -147,17 +311,29 @@ async def websocket_session(websocket: WebSocket, session_id: str):
             if message["type"] == "audio_chunk":
                 audio_data_len = len(message.get("data", ""))
                 logger.info(f"Audio data (base64) length: {audio_data_len} chars")
-                logger.info(f"Estimated audio size: ~{audio_data_len * 3 / 4:.0f} bytes")
-                logger.info(f"Processing audio chunk...")
-                await process_audio_chunk(session_id, message["data"], schema.fields)
+                # JSON edge: decode base64 once, then carry raw bytes
+                try:
+                    audio_bytes = decode_audio_payload(message["data"])
+                except ValueError as e:
+                    logger.error(f"[{datetime.now().isoformat()}] Failed to decode audio: {str(e)}")
+                    await manager.send_status(session_id, "error", f"Invalid audio data: {str(e)}")
+                    continue
+                logger.info(f"Queueing audio chunk ({len(audio_bytes)} bytes)...")
+                await enqueue(WorkItem("audio", audio_bytes))
             elif message["type"] == "text_chunk":
                 text_data = message.get("data", "")
                 logger.info(f"Text data: '{text_data}'")
-                logger.info(f"Processing text chunk...")
-                await process_text_chunk(session_id, message["data"], schema.fields)
+                logger.info(f"Queueing text chunk...")
+                await enqueue(WorkItem("text", message["data"]))
             elif message["type"] == "stop_recording":
                 logger.info(f"Stop recording signal received")
-                await manager.send_status(session_id, "stopped", "Recording stopped")
+                if segmenter is not None:
+                    # The next recording starts a new WebM stream, so flush and restart the decoder
+                    for utterance in await segmenter.close():
+                        await enqueue(WorkItem("audio", utterance, filename="utterance.wav"))
+                    segmenter = None
+                # Reported after the queued work so clients see it in order
+                await enqueue(WorkItem("stop"))
             else:
                 logger.warning(f"Unknown message type: {message.get('type')}")
             
@@ -165,46 +341,86 @@ async def websocket_session(websocket: WebSocket, session_id: str):
                 
     except WebSocketDisconnect:
         logger.info(f"[{datetime.now().isoformat()}] WebSocket disconnected for session: {session_id}")
-        manager.disconnect(websocket, session_id)
     except Exception as e:
         logger.error(f"[{datetime.now().isoformat()}] WebSocket error for session {session_id}: {str(e)}", exc_info=True)
+    finally:
+        # Also covers a clean "websocket.disconnect" and eviction; stops this socket's writer task
         manager.disconnect(websocket, session_id)
+        if segmenter is not None:
+            await segmenter.close()
+        # Let already-accepted work and its refinements finish so their results are persisted
+        await work_queue.close()
+        if refinements:
+            await asyncio.gather(*refinements, return_exceptions=True)
 
-async def process_audio_chunk(session_id: str, audio_data: str, fields: List[str]):
-    """Process audio chunk through transcription and intelligent agent"""
+async def process_audio_chunk(
+    session_id: str,
+    audio: AudioPayload,
+    fields: List[str],
+    services: ServiceRegistry,
+    filename: str = "audio.webm",
+    state: Optional[SessionFieldState] = None
+) -> Optional[Tuple[str, Dict]]:
+    """Process audio chunk through transcription and intelligent agent.
+    
+    Returns the transcript and the extraction result, or None if nothing was extracted from it.
+    """
     logger.info(f"[{datetime.now().isoformat()}] Starting audio processing for session: {session_id}")
     await manager.send_status(session_id, "processing", "Processing audio...")
     
-    # Decode base64 audio data from frontend
-    try:
-        audio_bytes = base64.b64decode(audio_data)
-        logger.info(f"[{datetime.now().isoformat()}] Decoded audio size: {len(audio_bytes)} bytes")
-    except Exception as e:
-        logger.error(f"[{datetime.now().isoformat()}] Failed to decode audio: {str(e)}")
-        await manager.send_status(session_id, "error", f"Invalid audio data: {str(e)}")
-        return
+    logger.info(f"[{datetime.now().isoformat()}] Audio size: {payload_size(audio)} bytes")
     
     # Transcribe audio using Groq Whisper
-    transcription_service = GroqTranscriptionService()
-    text = await transcription_service.transcribe_audio_chunk(audio_bytes)
-    
-    if not text:
-        logger.info(f"⚠️ No speech detected in audio")
-        await manager.send_status(session_id, "ready", "No speech detected")
+    try:
+        transcription_service = await services.get("transcription")
+    except RuntimeError as e:
+        logger.error(f"[{datetime.now().isoformat()}] {e}")
+        await manager.send_status(session_id, "error", str(e))
         return
     
-    logger.info(f"🎤 TRANSCRIPTION: '{text}'")
+    # The session's context does not depend on the transcript, so fetch it while Whisper runs
+    prefetch = None
+    if settings.context_prefetch_enabled:
+        prefetch = asyncio.create_task(prefetch_context(session_id, services, state))
     
-    # Send transcription to frontend for display
-    await manager.send_transcription(session_id, text)
-    
-    # Get conversation memory from Mem0
-    mem0_service = Mem0MemoryService()
-    context = await mem0_service.get_relevant_context(text, str(session_id))
+    # Every exit before the prefetch is awaited must cancel it
+    try:
+        text = await transcription_service.transcribe_audio_chunk(audio, filename=filename)
+        
+        if not text:
+            logger.info(f"⚠️ No speech detected in audio")
+            await manager.send_status(session_id, "ready", "No speech detected")
+            return
+        
+        logger.info(f"🎤 TRANSCRIPTION: '{text}'")
+        
+        # Send transcription to frontend for display
+        await manager.send_transcription(session_id, text)
+        
+        try:
+            pipeline = await services.get("pipeline")
+        except RuntimeError as e:
+            logger.error(f"[{datetime.now().isoformat()}] {e}")
+            await manager.send_status(session_id, "error", str(e))
+            return
+        # Without Mem0 the utterance is still extracted, just with no conversation context
+        mem0_service = await services.memory_or_null()
+        
+        # Known values come from the session's field store; Mem0 adds conversation context
+        if prefetch is not None:
+            context = await prefetch
+        else:
+            context = await mem0_service.get_relevant_context(text, str(session_id))
+    finally:
+        if prefetch is not None and not prefetch.done():
+            prefetch.cancel()
+    if state is not None:
+        state.record_utterance(text)
+        context = state.agent_context(fields, context)
     
-    # Run intelligent agent
-    intelligent_extractor = IntelligentExtractor()
-    result = intelligent_extractor.forward(text, fields, context)
+    # Run tiered extraction: rule-based fast path, then the intelligent agent
+    stream = FieldStream(session_id, state)
+    result = await pipeline.aforward(text, fields, context, state=state, on_field=stream.on_field)
     
     # Log agent action
     action = result['action_type']
@@ -224,49 +440,27 @@ async def process_audio_chunk(session_id: str, audio_data: str, fields: List[str
             action_taken=result["action_type"],
             extracted_fields=result["extracted_fields"]
         )
+        # All of the utterance's field values in one batched write
+        await mem0_service.update_field_memories(str(session_id), result["extracted_fields"])
         
-        # Store individual field extractions
         for field, field_value in result["extracted_fields"].items():
-            await mem0_service.update_field_memory(
-                session_id=str(session_id),
-                field_name=field,
-                field_value=field_value
-            )
-            
             # Send real-time update to frontend
-            logger.info(f"✅ FIELD UPDATE: {field} = '{field_value}'")
-            await manager.send_field_update(session_id, field, field_value)
-            
-            # Save to database
-            async with async_session() as db:
-                # Check if field already exists for this session
-                existing_data = await db.execute(
-                    select(SessionData).where(
-                        SessionData.session_id == session_id
-                    )
-                )
-                session_data_list = existing_data.scalars().all()
-                
-                # Update existing or create new
-                found = False
-                for sd in session_data_list:
-                    if field in sd.data:
-                        sd.data[field] = field_value
-                        found = True
-                        break
-                
-                if not found:
-                    # Create new session data record
-                    new_data = {field: field_value}
-                    session_data = SessionData(
-                        session_id=session_id,
-                        data=new_data
-                    )
-                    db.add(session_data)
-                
-                await db.commit()
+            confidence = result["confidences"].get(field)
+            logger.info(f"✅ FIELD UPDATE: {field} = '{field_value}' (confidence: {confidence})")
+            if not settings.stream_field_updates:
+                await manager.send_field_update(session_id, field, field_value, confidence)
+        # Partials were pushed while extracting; one message settles every field they touched
+        if settings.stream_field_updates:
+            await stream.reconcile(result)
+        
+        # Save all of the utterance's fields to the database in one transaction
+        await upsert_session_fields(session_id, result["extracted_fields"], result["confidences"])
+        if state is not None:
+            state.update(result["extracted_fields"], result["confidences"])
             
     elif result["action_type"] == ActionType.STORE_CONTEXT.value:
+        # Take back any fields streamed before the decision was final
+        await stream.reconcile(result)
         # Store context only in memory
         await mem0_service.add_conversation_memory(
             text=text,
@@ -277,20 +471,42 @@ async def process_audio_chunk(session_id: str, audio_data: str, fields: List[str
         await manager.send_status(session_id, "ready", "Context stored for future reference")
     else:
         # Ignored - not relevant to form filling
+        await stream.reconcile(result)
         await manager.send_status(session_id, "ready", "Audio processed")
+    
+    return text, result
 
-async def process_text_chunk(session_id: str, text: str, fields: List[str]):
+async def process_text_chunk(
+    session_id: str,
+    text: str,
+    fields: List[str],
+    services: ServiceRegistry,
+    state: Optional[SessionFieldState] = None
+) -> Optional[Tuple[str, Dict]]:
     """Process text through intelligent agent and send immediate field updates"""
     # Send the text input as transcription for consistency
     await manager.send_transcription(session_id, text)
     
-    # Get conversation memory from Mem0
-    mem0_service = Mem0MemoryService()
+    try:
+        pipeline = await services.get("pipeline")
+    except RuntimeError as e:
+        logger.error(f"[{datetime.now().isoformat()}] {e}")
+        await manager.send_status(session_id, "error", str(e))
+        return
+    # Without Mem0 the utterance is still extracted, just with no conversation context
+    mem0_service = await services.memory_or_null()
+    
+    if state is not None:
+        state.record_utterance(text)
+    
+    # Known values come from the session's field store; Mem0 adds conversation context
     context = await mem0_service.get_relevant_context(text, str(session_id))
+    if state is not None:
+        context = state.agent_context(fields, context)
     
-    # Run intelligent agent
-    intelligent_extractor = IntelligentExtractor()
-    result = intelligent_extractor.forward(text, fields, context)
+    # Run tiered extraction: rule-based fast path, then the intelligent agent
+    stream = FieldStream(session_id, state)
+    result = await pipeline.aforward(text, fields, context, state=state, on_field=stream.on_field)
     
     # Log agent action
     action = result['action_type']
@@ -310,49 +526,26 @@ async def process_text_chunk(session_id: str, text: str, fields: List[str]):
             action_taken=result["action_type"],
             extracted_fields=result["extracted_fields"]
         )
+        # All of the utterance's field values in one batched write
+        await mem0_service.update_field_memories(str(session_id), result["extracted_fields"])
         
         # Send each field update immediately to React frontend
-        for field, field_value in result["extracted_fields"].items():
-            # Store field in memory
-            await mem0_service.update_field_memory(
-                session_id=str(session_id),
-                field_name=field,
-                field_value=field_value
-            )
-            
-            # Send real-time update to frontend with high confidence
-            await manager.send_field_update(session_id, field, field_value)
-            
-            # Save to database
-            async with async_session() as db:
-                # Check if field already exists for this session
-                existing_data = await db.execute(
-                    select(SessionData).where(
-                        SessionData.session_id == session_id
-                    )
-                )
-                session_data_list = existing_data.scalars().all()
-                
-                # Update existing or create new
-                found = False
-                for sd in session_data_list:
-                    if field in sd.data:
-                        sd.data[field] = field_value
-                        found = True
-                        break
-                
-                if not found:
-                    # Create new session data record
-                    new_data = {field: field_value}
-                    session_data = SessionData(
-                        session_id=session_id,
-                        data=new_data
-                    )
-                    db.add(session_data)
-                
-                await db.commit()
+        if settings.stream_field_updates:
+            # Partials were pushed while extracting; one message settles every field they touched
+            await stream.reconcile(result)
+        else:
+            for field, field_value in result["extracted_fields"].items():
+                # Send real-time update to frontend with its confidence
+                await manager.send_field_update(session_id, field, field_value, result["confidences"].get(field))
+        
+        # Save all of the utterance's fields to the database in one transaction
+        await upsert_session_fields(session_id, result["extracted_fields"], result["confidences"])
+        if state is not None:
+            state.update(result["extracted_fields"], result["confidences"])
     
     elif result["action_type"] == ActionType.STORE_CONTEXT.value:
+        # Take back any fields streamed before the decision was final
+        await stream.reconcile(result)
         # Store context only in memory
         await mem0_service.add_conversation_memory(
             text=text,
@@ -363,4 +556,104 @@ async def process_text_chunk(session_id: str, text: str, fields: List[str]):
         await manager.send_status(session_id, "ready", "Context stored for future reference")
     else:
         # Ignored - not relevant to form filling
-        await manager.send_status(session_id, "ready", "Text processed")
\ No newline at end of file
+        await stream.reconcile(result)
+        await manager.send_status(session_id, "ready", "Text processed")
+    
+    return text, result
+
+async def recheck_fields(session_id: str, fields: List[str], services: ServiceRegistry, state: SessionFieldState):
+    """Re-extract low-confidence fields from the recent transcript and push any improvements"""
+    if not state.low_confidence_fields(fields):
+        return
+    try:
+        pipeline = await services.get("pipeline")
+    except RuntimeError as e:
+        logger.error(f"[{datetime.now().isoformat()}] {e}")
+        return
+    
+    result = await pipeline.arecheck(fields, state)
+    if not result["extracted_fields"]:
+        return
+    
+    for field, field_value in result["extracted_fields"].items():
+        confidence = result["confidences"][field]
+        logger.info(f"✅ FIELD RE-CHECKED: {field} = '{field_value}' (confidence: {confidence})")
+        await manager.send_field_update(session_id, field, field_value, confidence)
+    
+    await upsert_session_fields(session_id, result["extracted_fields"], result["confidences"])
+    state.update(result["extracted_fields"], result["confidences"])
+
+async def prefetch_context(session_id: str, services: ServiceRegistry, state: Optional[SessionFieldState]) -> str:
+    """Session context fetched before the transcript is known.
+    
+    Warm sessions are answered from Mem0's local cache; a cold session is
+    searched with its previous utterance as the query.
+    """
+    mem0_service = await services.memory_or_null()
+    hint = state.transcript[-1] if state is not None and state.transcript else "form filling conversation"
+    return await mem0_service.get_relevant_context(hint, str(session_id))
+
+async def refine_utterance(
+    session_id: str,
+    text: str,
+    fields: List[str],
+    services: ServiceRegistry,
+    state: Optional[SessionFieldState] = None,
+    baseline: Optional[Dict] = None
+):
+    """Re-run an ambiguous utterance with semantic-search context added.
+    
+    `baseline` is the session's field state when the utterance finished;
+    fields that changed since then were set by a later utterance and keep
+    their value.
+    """
+    try:
+        await _refine_utterance(session_id, text, fields, services, state, baseline)
+    except Exception as e:
+        logger.error(f"[{datetime.now().isoformat()}] Refinement failed for session {session_id}: {e}", exc_info=True)
+
+async def _refine_utterance(
+    session_id: str,
+    text: str,
+    fields: List[str],
+    services: ServiceRegistry,
+    state: Optional[SessionFieldState],
+    baseline: Optional[Dict]
+):
+    try:
+        pipeline = await services.get("pipeline")
+    except RuntimeError as e:
+        logger.error(f"[{datetime.now().isoformat()}] {e}")
+        return
+    mem0_service = await services.memory_or_null()
+    
+    extra_context = await mem0_service.search_context(text, str(session_id))
+    if not extra_context:
+        logger.info(f"🔎 REFINEMENT: no additional context for '{text}'")
+        return
+    
+    context = "\n".join(part for part in (await mem0_service.get_relevant_context(text, str(session_id)), extra_context) if part)
+    if state is not None:
+        context = state.agent_context(fields, context)
+    result = await pipeline.arefine(text, fields, context, state=state)
+    logger.info(f"🔎 REFINEMENT: {result['action_type']} - {result['extracted_fields']}")
+    if result["action_type"] != ActionType.EXTRACT_FIELDS.value or not result["extracted_fields"]:
+        return
+    
+    if state is not None and baseline is not None:
+        stale = [field for field in result["extracted_fields"] if state.fields.get(field) is not baseline.get(field)]
+        for field in stale:
+            logger.info(f"🔎 REFINEMENT: '{field}' changed since the utterance, keeping the newer value")
+            del result["extracted_fields"][field]
+            result["confidences"].pop(field, None)
+        if not result["extracted_fields"]:
+            return
+    # Claim the fields before any await, so a later utterance's values win from here on
+    if state is not None:
+        state.update(result["extracted_fields"], result["confidences"])
+    
+    await mem0_service.update_field_memories(str(session_id), result["extracted_fields"])
+    for field, field_value in result["extracted_fields"].items():
+        await manager.send_field_update(session_id, field, field_value, result["confidences"].get(field))
+    
+    await upsert_session_fields(session_id, result["extracted_fields"], result["confidences"])
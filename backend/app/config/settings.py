@@ -1,5 +1,7 @@
 """Simple settings for hackathon MVP."""
 
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -24,6 +26,98 @@ class Settings(BaseSettings):
     # Groq API key for DSPy LLM and Whisper transcription
     groq_api_key: str = ""
     
+    # Field extraction settings
+    extraction_mode: Literal["batched", "per_field"] = "batched"
+    # "two_step" (decide, then extract) or "combined" (one call does both); schemas
+    # larger than extraction_max_fields_per_prompt always use two_step
+    agent_mode: Literal["two_step", "combined"] = "two_step"
+    agent_reasoning: Literal["chain_of_thought", "predict"] = "chain_of_thought"  # "predict" has no reasoning tokens
+    extraction_max_fields_per_prompt: int = 20  # Cap on fields sent in one batched prompt
+    extraction_max_concurrency: int = 8  # Max in-flight LLM calls for async extraction
+    extraction_call_timeout: float = 20.0  # Seconds before a single LLM call is abandoned
+    
+    # Rule-based fast path in front of the LLM
+    rule_tier_enabled: bool = True
+    rule_min_confidence: float = 0.8  # Rule matches below this are left to the LLM
+    
+    # Per-session field state: settled fields are only re-extracted when mentioned
+    field_skip_enabled: bool = True
+    field_settled_confidence: float = 0.85  # Values at or above this are not re-asked
+    
+    # Field confidence: from token logprobs when llm_logprobs is on and the
+    # provider returns them, otherwise the model's self-reported score
+    llm_logprobs: bool = False
+    llm_field_confidence: float = 0.7  # Used when the model reports no usable score
+    field_min_confidence: float = 0.3  # LLM values below this are discarded
+    recheck_enabled: bool = True  # Re-extract low-confidence fields when the session goes idle
+    recheck_idle_seconds: float = 5.0
+    recheck_transcript_turns: int = 10  # Recent utterances given to the re-check
+    
+    # LLM response cache for AgentDecision / FieldExtractor calls
+    llm_cache_enabled: bool = True
+    llm_cache_max_entries: int = 2048
+    llm_cache_ttl_seconds: float = 3600.0
+    llm_cache_path: str = ""  # SQLite file for a persistent tier, e.g. "./data/llm_cache.db"
+    
+    # Shared HTTP connection pool for LLM and transcription clients
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_timeout: float = 60.0
+    service_retry_cooldown: float = 30.0  # Seconds a service that failed to start is not rebuilt
+    
+    # Streaming audio segmentation (buffer-until-silence)
+    audio_segmentation_enabled: bool = True
+    ffmpeg_path: str = "ffmpeg"
+    vad_energy_threshold: float = 500.0  # RMS amplitude separating speech from silence
+    vad_silence_ms: int = 1000  # Trailing silence that ends an utterance
+    vad_max_utterance_ms: int = 30000  # Force a cut for long monologues
+    vad_min_speech_ms: int = 200  # Shorter bursts are treated as noise
+    vad_pre_roll_ms: int = 300  # Audio kept before speech onset
+    vad_close_timeout: float = 5.0
+    
+    # Per-session WebSocket work queue
+    session_queue_maxsize: int = 16
+    session_queue_policy: Literal["drop_oldest", "coalesce", "reject"] = "drop_oldest"
+    stream_field_updates: bool = True  # Push each field while the LLM streams, then reconcile
+    ws_send_queue_size: int = 256  # Outbound messages buffered per socket; overflowing evicts it
+    ws_send_timeout: float = 10.0  # A single send stalled this long evicts the socket
+    ws_max_batch_fields: int = 100  # Field updates coalesced into one field_updates frame
+    
+    # Database profile
+    database_url: str = "sqlite+aiosqlite:///./data/data.db"  # or postgresql+asyncpg://...
+    database_echo: bool = False  # Log every SQL statement
+    sqlite_journal_mode: str = "WAL"  # Readers no longer block on writers
+    sqlite_synchronous: str = "NORMAL"  # Safe with WAL, far fewer fsyncs than FULL
+    sqlite_mmap_size: int = 268435456  # 256 MiB memory-mapped I/O
+    sqlite_cache_size: int = -65536  # Negative = KiB, i.e. 64 MiB page cache
+    sqlite_busy_timeout_ms: int = 5000  # Wait for locks instead of failing with "database is locked"
+    db_pool_size: int = 10  # Postgres only
+    db_max_overflow: int = 20  # Postgres only
+    db_pool_timeout: float = 30.0  # Postgres only
+    db_pool_recycle: int = 1800  # Postgres only, seconds
+    
+    # Export streaming
+    export_fetch_rows: int = 1000  # Rows fetched per database round trip
+    export_chunk_rows: int = 500  # CSV/NDJSON rows per streamed chunk
+    export_row_group_size: int = 10000  # Rows per Parquet row group / Arrow record batch
+    
+    # Mem0 memory: in-process context cache and write-behind to Qdrant
+    memory_recent_turns: int = 8  # Turns per session kept in the local ring buffer
+    memory_field_facts_enabled: bool = False  # Also upsert field values into Qdrant as facts (one batched write per utterance)
+    memory_max_sessions: int = 1000  # Sessions kept in the local cache (least recently used evicted)
+    memory_flush_interval: float = 2.0  # Seconds writes wait to be batched
+    memory_flush_max_items: int = 50  # Pending writes that trigger an immediate flush
+    memory_write_backlog: int = 64  # Unwritten turns kept per session; beyond it the oldest are merged, not dropped
+    memory_search_workers: int = 2  # Threads for per-utterance searches, never shared with writes
+    memory_write_workers: int = 2  # Threads for write-behind adds
+    memory_search_timeout: float = 3.0  # Seconds before a search degrades to "no context"
+    memory_write_timeout: float = 15.0  # Seconds per write-behind call (includes Mem0's LLM)
+    memory_close_timeout: float = 30.0  # Shutdown waits this long for the writer's in-flight flush
+    memory_breaker_failures: int = 5  # Consecutive failures that open a circuit (reads and writes have one each)
+    memory_breaker_reset_seconds: float = 30.0  # Cool-down before a trial call is let through
+    context_prefetch_enabled: bool = True  # Fetch session context while Whisper is still transcribing
+    context_refinement_enabled: bool = True  # Retry ambiguous decisions with semantic-search context
+    
     # CORS Settings
     cors_origins: list[str] = ["http://localhost:5173", "http://localhost:3000"]
 
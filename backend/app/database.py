@@ -1,15 +1,58 @@
-from sqlalchemy import create_engine, Column, String, JSON, DateTime, ForeignKey
+from sqlalchemy import create_engine, event, Column, String, JSON, DateTime, Float, ForeignKey, Index, select, delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 import uuid
 from datetime import datetime
+from app.config.settings import settings
 
-DATABASE_URL = "sqlite+aiosqlite:///./data/data.db"
+DATABASE_URL = settings.database_url
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+def _create_engine(url: str):
+    """Build the async engine using the database profile from settings."""
+    backend = make_url(url).get_backend_name()
+    
+    if backend == "sqlite":
+        sqlite_engine = create_async_engine(
+            url,
+            echo=settings.database_echo,
+            connect_args={"timeout": settings.sqlite_busy_timeout_ms / 1000}
+        )
+        
+        @event.listens_for(sqlite_engine.sync_engine, "connect")
+        def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+            cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+            cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+            cursor.execute(f"PRAGMA cache_size={int(settings.sqlite_cache_size)}")
+            cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+            cursor.close()
+        
+        return sqlite_engine
+    
+    # Server databases (e.g. postgresql+asyncpg) get a tuned connection pool
+    return create_async_engine(
+        url,
+        echo=settings.database_echo,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=True
+    )
+
+engine = _create_engine(DATABASE_URL)
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+def dialect_insert(table):
+    """INSERT construct supporting ON CONFLICT for the configured database."""
+    if engine.dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
 Base = declarative_base()
 
 class Schema(Base):
@@ -27,8 +70,14 @@ class Session(Base):
     schema_id = Column(String, ForeignKey("schemas.id"))
     name = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_sessions_schema_created", "schema_id", "created_at"),
+        Index("ix_sessions_created", "created_at"),
+    )
 
 class SessionData(Base):
+    """Legacy JSON blob storage, migrated into session_field_values on startup."""
     __tablename__ = "session_data"
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -36,6 +85,74 @@ class SessionData(Base):
     data = Column(JSON, nullable=False)  # {"field1": "value1", ...}
     created_at = Column(DateTime, default=datetime.utcnow)
 
+class SessionFieldValue(Base):
+    """Current value of one field in one session."""
+    __tablename__ = "session_field_values"
+    
+    # The composite primary key makes "all values of a session" an index range scan
+    session_id = Column(String, ForeignKey("sessions.id"), primary_key=True)
+    field = Column(String, primary_key=True)
+    value = Column(String, nullable=False)
+    confidence = Column(Float, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_session_field_values_session_updated", "session_id", "updated_at"),
+        Index("ix_session_field_values_field_session", "field", "session_id"),
+    )
+
+# SQLITE_MAX_VARIABLE_NUMBER on SQLite builds older than 3.32
+SQLITE_MAX_VARIABLES = 999
+
+def _migrate_session_data_blobs(conn):
+    """Move legacy SessionData JSON blobs into session_field_values.
+    
+    Later blobs win over earlier ones, and values already present in
+    session_field_values are newer than any blob, so they are kept.
+    """
+    rows = conn.execute(
+        select(SessionData.id, SessionData.session_id, SessionData.data, SessionData.created_at)
+        .order_by(SessionData.created_at)
+    ).all()
+    if not rows:
+        return
+    
+    values = {}
+    for _, session_id, data, created_at in rows:
+        for field, value in (data or {}).items():
+            if value is None:
+                # A null clears the field; value is NOT NULL, so there is no row to write
+                values.pop((session_id, field), None)
+                continue
+            values[(session_id, field)] = {
+                "session_id": session_id,
+                "field": field,
+                "value": str(value),
+                "updated_at": created_at or datetime.utcnow()
+            }
+    
+    # Insert and delete in batches that stay under SQLite's default limit of
+    # 999 bound parameters (4 per inserted row)
+    pending = list(values.values())
+    rows_per_insert = SQLITE_MAX_VARIABLES // 4
+    for start in range(0, len(pending), rows_per_insert):
+        conn.execute(
+            dialect_insert(SessionFieldValue)
+            .values(pending[start:start + rows_per_insert])
+            .on_conflict_do_nothing(index_elements=["session_id", "field"])
+        )
+    blob_ids = [row[0] for row in rows]
+    for start in range(0, len(blob_ids), SQLITE_MAX_VARIABLES):
+        conn.execute(delete(SessionData).where(SessionData.id.in_(blob_ids[start:start + SQLITE_MAX_VARIABLES])))
+
+def _create_missing_indexes(conn):
+    """create_all does not add new indexes to tables that already exist."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
 async def init_db():
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_create_missing_indexes)
+        await conn.run_sync(_migrate_session_data_blobs)
\ No newline at end of file
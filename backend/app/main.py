@@ -3,13 +3,17 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.database import init_db
 from app.api import schemas, sessions, websocket, export, audio
+from app.services.registry import ServiceRegistry
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await init_db()
+    app.state.services = ServiceRegistry()
+    await app.state.services.startup()
     yield
     # Shutdown
+    await app.state.services.shutdown()
 
 app = FastAPI(
     title="I-Fill-Forms API",
@@ -35,4 +39,4 @@ app.include_router(audio.router, prefix="/api/audio", tags=["audio"])
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return app.state.services.health()
\ No newline at end of file
@@ -1,11 +1,14 @@
 """
 DSPy optimization script for i-fill-forms signatures.
 This script optimizes the AgentDecision and FieldExtractor signatures using training data.
+It can also compare the two-step and combined (DecideAndExtract) agent modes,
+with and without chain-of-thought reasoning, on accuracy and latency.
 """
 
 import os
 import json
 import pickle
+import time
 from pathlib import Path
 from typing import List, Dict, Tuple
 import dspy
@@ -14,7 +17,9 @@ from dspy.teleprompt import BootstrapFewShot, BootstrapFewShotWithRandomSearch,
 # Import the signatures from the main module
 import sys
 sys.path.append(str(Path(__file__).parent.parent.parent))
-from app.agents.intelligent_extractor import AgentDecision, FieldExtractor
+from app.agents.intelligent_extractor import (
+    AgentDecision, FieldExtractor, BatchFieldExtractor, DecideAndExtract, build_predictor
+)
 from app.config.settings import settings
 
 
@@ -44,7 +49,16 @@ class DSPyOptimizer:
         examples = []
         for item in data:
             # Detect which type of example based on fields
-            if "action_type" in item:
+            if "action_type" in item and "field_values" in item:
+                # DecideAndExtract example
+                example = dspy.Example(
+                    conversation_history=item["conversation_history"],
+                    current_text=item["current_text"],
+                    schema_fields=self._field_list(item["schema_fields"]),
+                    action_type=item["action_type"],
+                    field_values=item["field_values"]
+                ).with_inputs('conversation_history', 'current_text', 'schema_fields')
+            elif "action_type" in item:
                 # AgentDecision example
                 example = dspy.Example(
                     conversation_history=item["conversation_history"],
@@ -66,6 +80,12 @@ class DSPyOptimizer:
         
         return examples
     
+    @staticmethod
+    def _field_list(schema_fields) -> List[str]:
+        if isinstance(schema_fields, str):
+            return [field.strip() for field in schema_fields.split(",") if field.strip()]
+        return list(schema_fields)
+    
     def decision_metric(self, gold: dspy.Example, pred: dspy.Prediction, trace=None) -> float:
         """
         Metric for evaluating AgentDecision predictions.
@@ -83,22 +103,47 @@ class DSPyOptimizer:
         Returns 1.0 for exact match, 0.5 for partial match, 0.0 for incorrect.
         """
         try:
-            gold_value = gold.value.lower().strip()
-            pred_value = pred.value.lower().strip()
-            
-            # Both are "none" - correct negative
-            if gold_value == "none" and pred_value == "none":
-                return 1.0
-            
-            # Exact match
-            if gold_value == pred_value:
-                return 1.0
-            
-            # Partial match - predicted contains gold or vice versa
-            if gold_value in pred_value or pred_value in gold_value:
-                return 0.5
-            
+            return self._value_score(gold.value, pred.value)
+        except:
             return 0.0
+    
+    @staticmethod
+    def _value_score(gold_value: str, pred_value: str) -> float:
+        gold_value = str(gold_value).lower().strip()
+        pred_value = str(pred_value).lower().strip()
+        
+        # Both are "none" - correct negative
+        if gold_value == "none" and pred_value == "none":
+            return 1.0
+        
+        # Exact match
+        if gold_value == pred_value:
+            return 1.0
+        
+        # Partial match - predicted contains gold or vice versa
+        if gold_value in pred_value or pred_value in gold_value:
+            return 0.5
+        
+        return 0.0
+    
+    def combined_metric(self, gold: dspy.Example, pred: dspy.Prediction, trace=None) -> float:
+        """
+        Metric for evaluating DecideAndExtract predictions.
+        0.0 for a wrong action; otherwise 1.0, or for extract_fields the mean
+        extraction score over the gold field values.
+        """
+        if self.decision_metric(gold, pred) == 0.0:
+            return 0.0
+        gold_values = gold.get("field_values") or {}
+        if gold.action_type.lower() != "extract_fields" or not gold_values:
+            return 1.0
+        try:
+            pred_values = {str(k).lower().strip(): v for k, v in (pred.field_values or {}).items()}
+            scores = [
+                self._value_score(value, pred_values.get(field.lower().strip(), "none"))
+                for field, value in gold_values.items()
+            ]
+            return sum(scores) / len(scores)
         except:
             return 0.0
     
@@ -328,6 +373,71 @@ class DSPyOptimizer:
         avg_score = sum(scores) / len(scores)
         print(f"   Baseline score: {avg_score:.2f}/1.0")
     
+    def compare_agent_modes(self, limit: int = 20) -> Dict[str, Dict[str, float]]:
+        """
+        Compare agent_mode x agent_reasoning settings on the validation sets.
+        
+        The two-step decision and the combined call are both scored with
+        decision_metric on the AgentDecision set; if a decide_and_extract set
+        exists, the combined call is also scored with combined_metric.
+        Latency is the mean wall time per example of the whole flow: for the
+        two-step mode that is the decision plus, for extract_fields decisions,
+        the extraction calls made per `extraction_mode`.
+        """
+        print("📊 Comparing agent modes...")
+        decision_val = self.load_dataset(self.data_dir / "agent_decision" / "val.json")[:limit]
+        combined_path = self.data_dir / "decide_and_extract" / "val.json"
+        combined_val = self.load_dataset(combined_path)[:limit] if combined_path.exists() else []
+        
+        results = {}
+        for reasoning in ("chain_of_thought", "predict"):
+            for mode, signature in (("two_step", AgentDecision), ("combined", DecideAndExtract)):
+                program = build_predictor(signature, reasoning)
+                extractor = self._build_extractor(reasoning) if mode == "two_step" else None
+                scores, seconds = [], []
+                for example in decision_val:
+                    inputs = example.inputs().toDict()
+                    fields = self._field_list(inputs["schema_fields"])
+                    if mode == "combined":
+                        inputs["schema_fields"] = fields
+                    started = time.perf_counter()
+                    pred = program(**inputs)
+                    if extractor is not None and pred.action_type == "extract_fields":
+                        extractor(inputs["current_text"], fields, inputs["conversation_history"])
+                    seconds.append(time.perf_counter() - started)
+                    scores.append(self.decision_metric(example, pred))
+                
+                name = f"{mode}/{reasoning}"
+                results[name] = {
+                    "decision_accuracy": sum(scores) / len(scores) if scores else 0.0,
+                    "avg_seconds": sum(seconds) / len(seconds) if seconds else 0.0
+                }
+                if mode == "combined" and combined_val:
+                    combined_scores = [self.combined_metric(example, program(**example.inputs().toDict())) for example in combined_val]
+                    results[name]["combined_score"] = sum(combined_scores) / len(combined_scores)
+                
+                print(f"   {name}: " + ", ".join(f"{k}={v:.3f}" for k, v in results[name].items()))
+        
+        return results
+    
+    @staticmethod
+    def _build_extractor(reasoning: str):
+        """The two-step mode's extraction calls, as `IntelligentExtractor.forward` makes them."""
+        if settings.extraction_mode == "batched":
+            program = build_predictor(BatchFieldExtractor, reasoning)
+            chunk_size = max(1, settings.extraction_max_fields_per_prompt)
+            
+            def extract(text: str, fields: List[str], context: str):
+                for i in range(0, len(fields), chunk_size):
+                    program(text=text, field_names=fields[i:i + chunk_size], context=context)
+        else:
+            program = build_predictor(FieldExtractor, reasoning)
+            
+            def extract(text: str, fields: List[str], context: str):
+                for field in fields:
+                    program(text=text, field_name=field, context=context)
+        return extract
+    
     def run_full_optimization(self, optimizer_type: str = "bootstrap"):
         """Run the full optimization pipeline."""
         print("🚀 Starting DSPy optimization pipeline...\n")
@@ -378,12 +488,19 @@ def main():
         action="store_true",
         help="Only evaluate baseline performance without optimization"
     )
+    parser.add_argument(
+        "--compare-modes",
+        action="store_true",
+        help="Compare two-step vs combined agent modes, with and without chain-of-thought"
+    )
     
     args = parser.parse_args()
     
     optimizer = DSPyOptimizer()
     
-    if args.baseline_only:
+    if args.compare_modes:
+        optimizer.compare_agent_modes()
+    elif args.baseline_only:
         optimizer.evaluate_baseline()
     else:
         optimizer.run_full_optimization(args.optimizer)
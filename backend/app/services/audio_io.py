@@ -0,0 +1,64 @@
+"""Audio payload helpers.
+
+Audio travels through the pipeline as raw bytes (or a memoryview over them).
+Base64 is only used at the JSON edges: the WebSocket `audio_chunk` message and
+the REST `/api/audio/chunk` endpoint decode it exactly once on arrival.
+"""
+
+import base64
+import binascii
+import io
+import os
+from typing import Union
+
+AudioPayload = Union[bytes, bytearray, memoryview]
+
+
+def decode_audio_payload(data: Union[str, bytes]) -> bytes:
+    """Decode a base64 audio payload from a JSON edge.
+
+    As lenient as the decoding it replaced: characters outside the base64
+    alphabet (e.g. line breaks from MIME-style encoders) are ignored.
+    Raises ValueError if what remains is not valid base64 (bad padding).
+    """
+    try:
+        return base64.b64decode(data)
+    except (binascii.Error, TypeError) as e:
+        raise ValueError(f"Invalid base64 audio payload: {e}") from e
+
+
+def payload_size(audio: AudioPayload) -> int:
+    """Size in bytes of an audio payload without copying it."""
+    return memoryview(audio).nbytes
+
+
+class AudioReader(io.RawIOBase):
+    """Seekable read-only file object over an audio payload.
+
+    Uploads read it in chunks straight from the underlying buffer, so a
+    memoryview utterance is never copied whole into a new bytes object.
+    """
+
+    def __init__(self, audio: AudioPayload):
+        self._view = memoryview(audio).cast("B")
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = max(0, min(len(buffer), self._view.nbytes - self._position))
+        buffer[:count] = self._view[self._position:self._position + count]
+        self._position += count
+        return count
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        base = {os.SEEK_SET: 0, os.SEEK_CUR: self._position, os.SEEK_END: self._view.nbytes}[whence]
+        self._position = max(0, base + offset)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
@@ -0,0 +1,208 @@
+"""Buffer-until-silence segmentation for continuous WebM/Opus audio streams.
+
+The browser's MediaRecorder sends a single WebM stream split into packets;
+only the first packet carries the container header, so packets cannot be
+decoded on their own. Each segmenter therefore owns one long-lived ffmpeg
+process that decodes the session's stream to 16 kHz mono PCM. Decoded frames
+are classified with an energy-based voice-activity check, and a complete
+utterance (as WAV) is emitted once enough trailing silence is seen or the
+maximum utterance length is reached.
+
+See thoughts/shared/research/2025-01-08_09-46-32_webm_audio_streaming.md.
+"""
+
+import asyncio
+import io
+import logging
+import wave
+from collections import deque
+from typing import List, Optional
+
+import numpy as np
+
+from app.config.settings import settings
+from app.services.audio_io import AudioPayload
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # 16-bit PCM
+FRAME_MS = 30
+FRAME_BYTES = SAMPLE_RATE * SAMPLE_WIDTH * FRAME_MS // 1000
+
+
+def pcm_to_wav(pcm: AudioPayload) -> memoryview:
+    """Wrap raw 16 kHz mono s16le PCM in a WAV container.
+
+    Returns a view over the WAV buffer rather than a copy of it.
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(SAMPLE_WIDTH)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(pcm)
+    return buffer.getbuffer()
+
+
+def frame_energy(frame: AudioPayload) -> float:
+    """Root-mean-square amplitude of a 16-bit PCM frame."""
+    samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+    if samples.size == 0:
+        return 0.0
+    return float(np.sqrt(np.mean(samples * samples)))
+
+
+class AudioSegmenter:
+    """Per-session streaming segmenter that emits complete utterances as WAV."""
+
+    def __init__(
+        self,
+        energy_threshold: Optional[float] = None,
+        silence_ms: Optional[int] = None,
+        max_utterance_ms: Optional[int] = None,
+        min_speech_ms: Optional[int] = None,
+        pre_roll_ms: Optional[int] = None,
+    ):
+        # None falls back to settings; an explicit 0 is a valid override
+        if energy_threshold is None:
+            energy_threshold = settings.vad_energy_threshold
+        if silence_ms is None:
+            silence_ms = settings.vad_silence_ms
+        if max_utterance_ms is None:
+            max_utterance_ms = settings.vad_max_utterance_ms
+        if min_speech_ms is None:
+            min_speech_ms = settings.vad_min_speech_ms
+        if pre_roll_ms is None:
+            pre_roll_ms = settings.vad_pre_roll_ms
+
+        self.energy_threshold = energy_threshold
+        self.silence_frames = silence_ms // FRAME_MS
+        self.max_frames = max_utterance_ms // FRAME_MS
+        self.min_speech_frames = min_speech_ms // FRAME_MS
+        pre_roll_frames = pre_roll_ms // FRAME_MS
+
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._ready: asyncio.Queue = asyncio.Queue()
+
+        # Segmentation state (only touched by the reader task)
+        self._pre_roll: deque = deque(maxlen=max(0, pre_roll_frames))
+        self._utterance = bytearray()
+        self._in_speech = False
+        self._speech_frames = 0
+        self._utterance_frames = 0
+        self._trailing_silence = 0
+
+    @classmethod
+    async def create(cls, **kwargs) -> "AudioSegmenter":
+        segmenter = cls(**kwargs)
+        await segmenter.start()
+        return segmenter
+
+    async def start(self):
+        """Spawn the ffmpeg decoder. Raises FileNotFoundError if ffmpeg is missing."""
+        self._process = await asyncio.create_subprocess_exec(
+            settings.ffmpeg_path,
+            "-hide_banner", "-loglevel", "error",
+            "-fflags", "nobuffer", "-probesize", "32768", "-analyzeduration", "0",
+            "-i", "pipe:0",
+            "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE),
+            "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        self._reader = asyncio.create_task(self._read_pcm())
+
+    async def feed(self, packet: AudioPayload) -> List[memoryview]:
+        """Add an encoded packet; return any utterances completed so far."""
+        if self._process is None or self._process.stdin.is_closing():
+            raise RuntimeError("Audio segmenter is not running")
+        try:
+            self._process.stdin.write(packet)
+            await self._process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError) as e:
+            logger.error(f"Audio decoder stopped accepting data: {e}")
+        return self._drain_ready()
+
+    async def close(self) -> List[memoryview]:
+        """Finish decoding the stream and return the remaining utterances."""
+        if self._process is not None:
+            if not self._process.stdin.is_closing():
+                self._process.stdin.close()
+            try:
+                await asyncio.wait_for(self._reader, timeout=settings.vad_close_timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Audio decoder did not finish in time, killing it")
+                self._reader.cancel()
+            if self._process.returncode is None:
+                self._process.kill()
+            await self._process.wait()
+            self._process = None
+        return self._drain_ready()
+
+    def _drain_ready(self) -> List[memoryview]:
+        utterances = []
+        while not self._ready.empty():
+            utterances.append(self._ready.get_nowait())
+        return utterances
+
+    async def _read_pcm(self):
+        pending = bytearray()
+        try:
+            while True:
+                data = await self._process.stdout.read(FRAME_BYTES * 8)
+                if not data:
+                    break
+                pending += data
+                usable = len(pending) - len(pending) % FRAME_BYTES
+                # Slice through a view so each frame is copied exactly once
+                with memoryview(pending) as view:
+                    for offset in range(0, usable, FRAME_BYTES):
+                        self._process_frame(bytes(view[offset:offset + FRAME_BYTES]))
+                del pending[:usable]
+        except Exception as e:
+            logger.error(f"Audio decoder read error: {e}", exc_info=True)
+        finally:
+            # End of stream: whatever speech is buffered is a complete utterance
+            self._emit()
+
+    def _process_frame(self, frame: bytes):
+        is_speech = frame_energy(frame) >= self.energy_threshold
+
+        if not self._in_speech:
+            if is_speech:
+                # Speech onset: include the pre-roll so the first word is not clipped
+                self._in_speech = True
+                for earlier in self._pre_roll:
+                    self._utterance += earlier
+                self._utterance_frames = len(self._pre_roll)
+                self._pre_roll.clear()
+            else:
+                self._pre_roll.append(frame)
+                return
+
+        self._utterance += frame
+        self._utterance_frames += 1
+        if is_speech:
+            self._speech_frames += 1
+            self._trailing_silence = 0
+        else:
+            self._trailing_silence += 1
+
+        if self._trailing_silence >= self.silence_frames or self._utterance_frames >= self.max_frames:
+            self._emit()
+
+    def _emit(self):
+        if self._in_speech and self._speech_frames >= self.min_speech_frames:
+            self._ready.put_nowait(pcm_to_wav(self._utterance))
+            logger.info(
+                f"Utterance ready: {self._utterance_frames * FRAME_MS} ms "
+                f"({self._speech_frames * FRAME_MS} ms speech)"
+            )
+        self._utterance = bytearray()
+        self._in_speech = False
+        self._speech_frames = 0
+        self._utterance_frames = 0
+        self._trailing_silence = 0
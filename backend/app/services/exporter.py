@@ -0,0 +1,231 @@
+"""Streaming export of session field values.
+
+Rows are read from a server-side cursor (`AsyncSession.stream` with
+`yield_per`) and written out in small chunks, so memory stays flat no
+matter how large the export is.
+"""
+
+import asyncio
+import csv
+import io
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import orjson
+from sqlalchemy import select
+
+from app.config.settings import settings
+from app.database import async_session, Session, Schema, SessionFieldValue
+
+# Per-session columns written ahead of the schema fields in bulk exports
+METADATA_COLUMNS = ["session_id", "session_name", "schema_id", "created_at"]
+
+
+async def iter_session_values(*criteria) -> AsyncIterator[Tuple[str, Dict[str, str]]]:
+    """Yield (session_id, {field: value}) for each session matching `criteria`."""
+    stmt = (
+        select(SessionFieldValue.session_id, SessionFieldValue.field, SessionFieldValue.value)
+        .where(*criteria)
+        .order_by(SessionFieldValue.session_id)  # Primary-key order, so rows arrive grouped
+        .execution_options(yield_per=settings.export_fetch_rows)
+    )
+    
+    async with async_session() as db:
+        result = await db.stream(stmt)
+        current_id = None
+        current_values: Dict[str, str] = {}
+        async for session_id, field, value in result:
+            if session_id != current_id:
+                if current_id is not None:
+                    yield current_id, current_values
+                current_id = session_id
+                current_values = {}
+            current_values[field] = value
+        if current_id is not None:
+            yield current_id, current_values
+
+
+async def stream_csv(
+    fields: List[str],
+    rows: AsyncIterator[Tuple[str, Dict[str, str]]]
+) -> AsyncIterator[str]:
+    """Render session rows as CSV in schema column order, a chunk at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    
+    pending = 0
+    async for _, values in rows:
+        writer.writerow([values.get(field, "") for field in fields])
+        pending += 1
+        if pending >= settings.export_chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+    
+    yield buffer.getvalue()
+
+
+def session_criteria(
+    schema_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> list:
+    """Filters on the sessions table for a bulk export."""
+    criteria = []
+    if schema_id:
+        criteria.append(Session.schema_id == schema_id)
+    if start:
+        criteria.append(Session.created_at >= start)
+    if end:
+        criteria.append(Session.created_at < end)
+    return criteria
+
+
+async def resolve_export_fields(criteria: list) -> List[str]:
+    """Union of the schema fields of all matching sessions, in schema order."""
+    async with async_session() as db:
+        result = await db.execute(
+            select(Schema.fields)
+            .where(Schema.id.in_(select(Session.schema_id).where(*criteria).distinct()))
+            .order_by(Schema.created_at)
+        )
+        fields: Dict[str, None] = {}
+        for (schema_fields,) in result.all():
+            fields.update(dict.fromkeys(schema_fields))
+        return list(fields)
+
+
+async def iter_bulk_rows(criteria: list, fields: List[str]) -> AsyncIterator[Dict[str, Any]]:
+    """Yield one flat row (metadata + projected fields) per matching session."""
+    stmt = (
+        select(
+            Session.id, Session.name, Session.schema_id, Session.created_at,
+            SessionFieldValue.field, SessionFieldValue.value
+        )
+        .outerjoin(
+            SessionFieldValue,
+            (SessionFieldValue.session_id == Session.id) & SessionFieldValue.field.in_(fields)
+        )
+        .where(*criteria)
+        .order_by(Session.id)
+        .execution_options(yield_per=settings.export_fetch_rows)
+    )
+    
+    async with async_session() as db:
+        result = await db.stream(stmt)
+        row = None
+        async for session_id, name, schema_id, created_at, field, value in result:
+            if row is None or row["session_id"] != session_id:
+                if row is not None:
+                    yield row
+                row = {
+                    "session_id": session_id,
+                    "session_name": name,
+                    "schema_id": schema_id,
+                    "created_at": created_at,
+                }
+                row.update(dict.fromkeys(fields))
+            if field is not None:
+                row[field] = value
+        if row is not None:
+            yield row
+
+
+async def stream_ndjson(rows: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Render rows as newline-delimited JSON."""
+    chunk = bytearray()
+    pending = 0
+    async for row in rows:
+        chunk += orjson.dumps(row)
+        chunk += b"\n"
+        pending += 1
+        if pending >= settings.export_chunk_rows:
+            yield bytes(chunk)
+            chunk.clear()
+            pending = 0
+    yield bytes(chunk)
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back out in chunks."""
+    
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+    
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        self.closed = True
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+async def stream_columnar(
+    rows: AsyncIterator[Dict[str, Any]],
+    fields: List[str],
+    output_format: str
+) -> AsyncIterator[bytes]:
+    """Render rows as Parquet ("parquet") or Arrow IPC stream ("arrow").
+    
+    Each batch of `export_row_group_size` rows becomes one Parquet row group
+    or Arrow record batch and is streamed as soon as it is written. Batches
+    are encoded (and zstd-compressed) in a worker thread, off the event loop.
+    Requires pyarrow (the "analytics" extra).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    columns = METADATA_COLUMNS + fields
+    arrow_schema = pa.schema(
+        [
+            ("session_id", pa.string()),
+            ("session_name", pa.string()),
+            ("schema_id", pa.string()),
+            ("created_at", pa.timestamp("us")),
+        ]
+        + [(field, pa.string()) for field in fields]
+    )
+    
+    sink = _ChunkSink()
+    if output_format == "parquet":
+        writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), arrow_schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), arrow_schema)
+    
+    def write_batch(batch: Dict[str, list]):
+        record_batch = pa.record_batch([batch[column] for column in columns], schema=arrow_schema)
+        writer.write_batch(record_batch)
+    
+    batch = {column: [] for column in columns}
+    pending = 0
+    async for row in rows:
+        for column in columns:
+            batch[column].append(row.get(column))
+        pending += 1
+        if pending >= settings.export_row_group_size:
+            await asyncio.to_thread(write_batch, batch)
+            batch = {column: [] for column in columns}
+            pending = 0
+            yield sink.drain()
+    
+    if pending:
+        await asyncio.to_thread(write_batch, batch)
+    await asyncio.to_thread(writer.close)
+    yield sink.drain()
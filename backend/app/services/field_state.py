@@ -0,0 +1,91 @@
+"""Per-session field state: what has been filled, how confidently and when.
+
+The WebSocket handler loads one `SessionFieldState` per connection from
+`session_field_values` and keeps it current as utterances are processed, so
+extraction can skip fields that are already settled instead of re-asking the
+LLM about the whole schema on every utterance.
+
+It is also the source of truth for known values in the agent's context: they
+are rendered deterministically from here rather than recalled from Mem0 by
+semantic search, which is left to unstructured conversation context.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+
+from app.config.settings import settings
+from app.database import async_session, SessionFieldValue
+
+
+@dataclass
+class FieldState:
+    value: str
+    confidence: Optional[float]
+    updated_at: datetime
+
+
+class SessionFieldState:
+    """In-memory view of a session's filled fields."""
+
+    def __init__(self, session_id: str, fields: Optional[Dict[str, FieldState]] = None):
+        self.session_id = session_id
+        self.fields: Dict[str, FieldState] = fields or {}
+        # Recent utterances, re-read when low-confidence fields are re-checked
+        self.transcript: deque = deque(maxlen=max(1, settings.recheck_transcript_turns))
+
+    @classmethod
+    async def load(cls, session_id: str) -> "SessionFieldState":
+        async with async_session() as db:
+            result = await db.execute(
+                select(
+                    SessionFieldValue.field,
+                    SessionFieldValue.value,
+                    SessionFieldValue.confidence,
+                    SessionFieldValue.updated_at,
+                ).where(SessionFieldValue.session_id == session_id)
+            )
+            return cls(session_id, {
+                field: FieldState(value, confidence, updated_at)
+                for field, value, confidence, updated_at in result.all()
+            })
+
+    def is_settled(self, field: str) -> bool:
+        """True if the field has a value at or above `field_settled_confidence`."""
+        state = self.fields.get(field)
+        return (
+            state is not None
+            and state.confidence is not None
+            and state.confidence >= settings.field_settled_confidence
+        )
+
+    def open_fields(self, fields: List[str]) -> List[str]:
+        return [field for field in fields if not self.is_settled(field)]
+
+    def low_confidence_fields(self, fields: List[str]) -> List[str]:
+        """Filled fields that are not settled yet."""
+        return [field for field in fields if field in self.fields and not self.is_settled(field)]
+
+    def confidence(self, field: str) -> Optional[float]:
+        state = self.fields.get(field)
+        return state.confidence if state is not None else None
+
+    def known_fields_context(self, fields: List[str]) -> str:
+        """Filled fields in schema order, one per line."""
+        lines = [f"- {field}: {self.fields[field].value}" for field in fields if field in self.fields]
+        return "Known form fields:\n" + "\n".join(lines) if lines else ""
+
+    def agent_context(self, fields: List[str], conversation_context: str = "") -> str:
+        """`conversation_history` for the agent: known values first, then unstructured context."""
+        return "\n".join(part for part in (self.known_fields_context(fields), conversation_context) if part)
+
+    def record_utterance(self, text: str):
+        self.transcript.append(text)
+
+    def update(self, values: Dict[str, str], confidences: Optional[Dict[str, float]] = None):
+        now = datetime.utcnow()
+        for field, value in values.items():
+            self.fields[field] = FieldState(value, (confidences or {}).get(field), now)
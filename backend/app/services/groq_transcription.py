@@ -1,44 +1,34 @@
-import tempfile
-import os
 import logging
-import asyncio
 from typing import Optional
-from groq import Groq
+import httpx
+from groq import AsyncGroq
 from app.config.settings import settings
+from app.services.audio_io import AudioPayload, AudioReader
 
 logger = logging.getLogger(__name__)
 
 class GroqTranscriptionService:
-    def __init__(self):
-        self.client = Groq(api_key=settings.groq_api_key)
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
+        # Reuse the process-wide connection pool when one is provided
+        self.client = AsyncGroq(api_key=settings.groq_api_key, http_client=http_client)
         self.model = "whisper-large-v3-turbo"  # Fast Groq Whisper model
     
-    async def transcribe_audio_chunk(self, audio_data: bytes) -> Optional[str]:
-        """Transcribe audio chunk using Groq Whisper API."""
+    async def transcribe_audio_chunk(self, audio_data: AudioPayload, filename: str = "audio.webm") -> Optional[str]:
+        """Transcribe audio chunk using Groq Whisper API.
+        
+        Audio is uploaded straight from memory; the filename extension tells
+        Whisper the container format.
+        """
         try:
-            # Save audio data to temporary file
-            with tempfile.NamedTemporaryFile(suffix='.webm', delete=False) as temp_file:
-                temp_file.write(audio_data)
-                temp_file_path = temp_file.name
-            
-            # Use Groq SDK to transcribe - run in executor since it's synchronous
-            loop = asyncio.get_event_loop()
-            
-            def transcribe_sync():
-                with open(temp_file_path, 'rb') as audio_file:
-                    transcription = self.client.audio.transcriptions.create(
-                        file=audio_file,
-                        model=self.model,
-                        response_format="text",
-                        temperature=0.0
-                    )
-                    return transcription
-            
-            # Run the synchronous SDK call in an executor
-            transcription = await loop.run_in_executor(None, transcribe_sync)
-            
-            # Cleanup temp file
-            os.unlink(temp_file_path)
+            # The SDK accepts a (filename, bytes or file object) spec, so no temp file is
+            # needed; buffers from the segmenter are streamed from memory without a copy
+            content = audio_data if isinstance(audio_data, bytes) else AudioReader(audio_data)
+            transcription = await self.client.audio.transcriptions.create(
+                file=(filename, content),
+                model=self.model,
+                response_format="text",
+                temperature=0.0
+            )
             
             if transcription:
                 return transcription
@@ -47,7 +37,4 @@ class GroqTranscriptionService:
                 
         except Exception as e:
             logger.error(f"Transcription error: {e}")
-            # Cleanup temp file if it exists
-            if 'temp_file_path' in locals() and os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
-            return None
\ No newline at end of file
+            return None
@@ -1,8 +1,32 @@
 from mem0 import Memory
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
 import os
 import asyncio
+import hashlib
+import logging
+import uuid
 from app.config.settings import settings
+from app.services.resilience import BoundedExecutor, CircuitBreaker, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+class SessionContext:
+    """Recent turns of one session, kept in process.
+    
+    Field values are not part of it: the agent reads them from the session's
+    field store (`app.services.field_state`).
+    """
+    
+    def __init__(self):
+        self.turns: deque = deque(maxlen=max(1, settings.memory_recent_turns))
+        self.recalled: List[str] = []  # Mem0 search results for sessions resumed after a restart
+    
+    def format(self) -> str:
+        parts = list(self.recalled)
+        parts += [f"Previous: User said: {text} (action: {action})" for text, action in self.turns]
+        return "\n".join(parts)
 
 class Mem0MemoryService:
     def __init__(self):
@@ -33,75 +57,313 @@ class Mem0MemoryService:
             }
         }
         self.memory = Memory.from_config(self.config)
+        
+        # Context is served from here; Mem0 is only searched for sessions not seen yet
+        self._sessions: "OrderedDict[str, SessionContext]" = OrderedDict()
+        
+        # Write-behind: writes are batched here and flushed to Mem0 in the background
+        self._pending_turns: Dict[str, List[Tuple[str, str, Dict]]] = {}
+        self._pending_fields: Dict[str, Dict[str, str]] = {}
+        self._flush_requested: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.stats = {
+            "local_hits": 0, "searches": 0, "writes_queued": 0, "writes_coalesced": 0, "adds": 0,
+            "turns_merged": 0, "turns_dropped": 0
+        }
+        
+        # Blocking Mem0/Qdrant calls get their own pools so they cannot starve the default
+        # executor; a failing backend trips a breaker and extraction runs without context.
+        # Searches and writes never share a pool or breaker, so a write-behind backlog
+        # (adds include Mem0's own LLM call) cannot slow or trip per-utterance searches.
+        self._search_executor = self._bounded_executor("mem0-search", settings.memory_search_workers)
+        self._write_executor = self._bounded_executor("mem0-write", settings.memory_write_workers)
     
     async def add_conversation_memory(self, 
                                     text: str, 
                                     session_id: str, 
                                     action_taken: str,
-                                    extracted_fields: Dict = None) -> str:
-        """Store conversation interaction in Mem0."""
-        messages = [
-            {
-                "role": "user", 
-                "content": f"User said: {text}"
-            },
-            {
-                "role": "assistant", 
-                "content": f"Action taken: {action_taken}. Fields extracted: {extracted_fields or {}}"
-            }
-        ]
+                                    extracted_fields: Dict = None):
+        """Record a conversation turn locally and queue it for Mem0."""
+        context = self._session(session_id)
+        context.turns.append((text, action_taken))
         
-        # Store with session-scoped memory
-        result = await asyncio.to_thread(
-            self.memory.add,
-            messages=messages,
-            user_id=session_id,
-            metadata={
-                "action": action_taken,
-                "extracted_fields": extracted_fields or {},
-                "interaction_type": "form_filling"
-            }
-        )
-        return result
+        pending = self._pending_turns.setdefault(session_id, [])
+        pending.append((text, action_taken, extracted_fields or {}))
+        self._bound_backlog(session_id, pending)
+        self._queued()
     
     async def get_relevant_context(self, 
                                  query: str, 
                                  session_id: str, 
                                  limit: int = 5) -> str:
-        """Retrieve relevant memories for current interaction."""
-        search_results = await asyncio.to_thread(
-            self.memory.search,
-            query=query,
-            user_id=session_id,
-            limit=limit
-        )
+        """Retrieve unstructured conversation context for the current interaction."""
+        context = self._sessions.get(session_id)
+        if context is not None:
+            self._sessions.move_to_end(session_id)
+            self.stats["local_hits"] += 1
+            return context.format()
         
-        if not search_results or "results" not in search_results:
+        # Unknown session (e.g. after a restart): fall back to semantic search
+        context_parts = await self._search(query, session_id, limit)
+        if context_parts is None:
             return ""
         
+        # Later turns of this session are served from the local cache
+        self._session(session_id).recalled = context_parts
+        return "\n".join(context_parts)
+    
+    async def search_context(self, query: str, session_id: str, limit: int = 5) -> str:
+        """Semantic search only, for memories the local context does not already hold."""
+        context_parts = await self._search(query, session_id, limit) or []
+        context = self._sessions.get(session_id)
+        known = set(context.format().split("\n")) if context is not None else set()
+        return "\n".join(part for part in context_parts if part not in known)
+    
+    async def _search(self, query: str, session_id: str, limit: int) -> Optional[List[str]]:
+        """Mem0 search formatted as context lines, or None if Mem0 is unavailable."""
+        self.stats["searches"] += 1
+        try:
+            search_results = await self._search_executor.run(
+                settings.memory_search_timeout,
+                self.memory.search,
+                query=query,
+                user_id=session_id,
+                limit=limit
+            )
+        except (CircuitOpenError, asyncio.TimeoutError) as e:
+            logger.warning(f"Mem0 search unavailable, continuing without context: {e!r}")
+            return None
+        except Exception as e:
+            logger.error(f"Mem0 search failed, continuing without context: {e}")
+            return None
+        
         # Format memories into context string
         context_parts = []
-        for result in search_results["results"]:
+        for result in (search_results or {}).get("results", []):
+            # Field values come from the field store; skip field memories older versions wrote
+            if (result.get("metadata") or {}).get("memory_type") == "field_extraction":
+                continue
             memory_text = result.get("memory", "")
             context_parts.append(f"Previous: {memory_text}")
+        return context_parts
+    
+    async def update_field_memories(self, session_id: str, fields: Dict[str, str]):
+        """Queue all of an utterance's field values as Mem0 facts (`memory_field_facts_enabled`).
         
-        return "\n".join(context_parts)
+        The agent reads known values from the field store, so this only keeps
+        Qdrant's copy current for tools that search it. Later values replace
+        earlier ones, both in the queue and in Qdrant.
+        """
+        if not fields or not settings.memory_field_facts_enabled:
+            return
+        
+        pending = self._pending_fields.setdefault(session_id, {})
+        for field_name, field_value in fields.items():
+            if field_name in pending:
+                self.stats["writes_coalesced"] += 1
+            pending[field_name] = field_value
+        self._queued()
     
-    async def update_field_memory(self, 
-                                session_id: str, 
-                                field_name: str, 
-                                field_value: str):
-        """Store field extraction as persistent memory."""
-        message = f"User's {field_name} is {field_value}"
+    async def flush(self):
+        """Write every pending turn and field to Mem0.
         
-        result = await asyncio.to_thread(
+        While the circuit is open, writes stay queued for a later flush. If the
+        flush is cancelled, the part of the batch not yet written is queued
+        again rather than lost.
+        """
+        turns, self._pending_turns = self._pending_turns, {}
+        fields, self._pending_fields = self._pending_fields, {}
+        
+        try:
+            while turns:
+                session_id, session_turns = next(iter(turns.items()))
+                try:
+                    await self._add_turns(session_id, session_turns)
+                except CircuitOpenError:
+                    self._requeue_turns(session_id, session_turns)
+                except Exception as e:
+                    logger.error(f"Failed to store {len(session_turns)} turn(s) for session {session_id}: {e!r}")
+                del turns[session_id]
+            while fields:
+                session_id, session_fields = next(iter(fields.items()))
+                try:
+                    await self._write_executor.run(
+                        settings.memory_write_timeout, self._write_fields, session_id, session_fields
+                    )
+                except CircuitOpenError:
+                    self._requeue_fields(session_id, session_fields)
+                except Exception as e:
+                    logger.error(f"Failed to store {len(session_fields)} field(s) for session {session_id}: {e!r}")
+                del fields[session_id]
+        except asyncio.CancelledError:
+            for session_id, session_turns in turns.items():
+                self._requeue_turns(session_id, session_turns)
+            for session_id, session_fields in fields.items():
+                self._requeue_fields(session_id, session_fields)
+            raise
+    
+    def health(self) -> Dict:
+        return {
+            **self.stats,
+            "pending_writes": self._pending_count(),
+            "search_executor": self._search_executor.snapshot(),
+            "write_executor": self._write_executor.snapshot(),
+        }
+    
+    async def close(self):
+        """Let the background writer finish its flush, then flush what is still pending."""
+        self._stopping = True
+        if self._writer is not None:
+            self._flush_requested.set()
+            try:
+                await asyncio.wait_for(self._writer, timeout=settings.memory_close_timeout)
+            except asyncio.TimeoutError:
+                # wait_for cancelled the writer; its unwritten batch was queued again
+                logger.warning(f"Mem0 writer did not finish within {settings.memory_close_timeout}s")
+            self._writer = None
+        await self.flush()
+        if self._pending_count():
+            self.stats["turns_dropped"] += sum(map(len, self._pending_turns.values()))
+            logger.warning(f"Discarding {self._pending_count()} Mem0 write(s) that could not be flushed")
+        self._search_executor.shutdown()
+        self._write_executor.shutdown()
+    
+    @staticmethod
+    def _bounded_executor(name: str, max_workers: int) -> BoundedExecutor:
+        return BoundedExecutor(
+            name,
+            max_workers=max_workers,
+            breaker=CircuitBreaker(
+                name,
+                failure_threshold=settings.memory_breaker_failures,
+                reset_seconds=settings.memory_breaker_reset_seconds
+            )
+        )
+    
+    def _session(self, session_id: str) -> SessionContext:
+        context = self._sessions.get(session_id)
+        if context is None:
+            context = self._sessions[session_id] = SessionContext()
+            while len(self._sessions) > settings.memory_max_sessions:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(session_id)
+        return context
+    
+    def _requeue_turns(self, session_id: str, turns: List[Tuple[str, str, Dict]]):
+        pending = self._pending_turns[session_id] = turns + self._pending_turns.get(session_id, [])
+        self._bound_backlog(session_id, pending)
+    
+    def _bound_backlog(self, session_id: str, pending: List[Tuple[str, str, Dict]]):
+        """Keep a session's backlog within `memory_write_backlog` turns without losing any.
+        
+        The oldest turns are folded into one: their texts are joined and their
+        fields merged (later values win), so Mem0 still receives everything.
+        """
+        limit = max(2, settings.memory_write_backlog)
+        while len(pending) > limit:
+            (first_text, _, first_fields), (second_text, action, second_fields) = pending[0], pending[1]
+            pending[0:2] = [(f"{first_text} {second_text}", action, {**first_fields, **second_fields})]
+            self.stats["turns_merged"] += 1
+            logger.warning(f"Mem0 write backlog full for session {session_id}, merged its two oldest turns")
+    
+    def _requeue_fields(self, session_id: str, fields: Dict[str, str]):
+        # Values queued meanwhile are newer and win
+        self._pending_fields[session_id] = {**fields, **self._pending_fields.get(session_id, {})}
+    
+    def _pending_count(self) -> int:
+        return sum(map(len, self._pending_turns.values())) + sum(map(len, self._pending_fields.values()))
+    
+    def _queued(self):
+        self.stats["writes_queued"] += 1
+        if self._stopping:
+            # close() flushes whatever is still pending
+            return
+        if self._writer is None or self._writer.done():
+            self._flush_requested = asyncio.Event()
+            self._writer = asyncio.create_task(self._write_behind())
+        if self._pending_count() >= settings.memory_flush_max_items:
+            self._flush_requested.set()
+    
+    async def _write_behind(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=settings.memory_flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            if self._pending_turns or self._pending_fields:
+                await self.flush()
+    
+    async def _add_turns(self, session_id: str, turns: List[Tuple[str, str, Dict]]):
+        """Store a session's queued conversation turns with a single Mem0 add."""
+        messages = []
+        extracted_fields = {}
+        for text, action_taken, fields in turns:
+            messages.append({
+                "role": "user", 
+                "content": f"User said: {text}"
+            })
+            messages.append({
+                "role": "assistant", 
+                "content": f"Action taken: {action_taken}. Fields extracted: {fields}"
+            })
+            extracted_fields.update(fields)
+        
+        # Store with session-scoped memory
+        self.stats["adds"] += 1
+        await self._write_executor.run(
+            settings.memory_write_timeout,
             self.memory.add,
-            messages=[{"role": "system", "content": message}],
+            messages=messages,
             user_id=session_id,
             metadata={
-                "field_name": field_name,
-                "field_value": field_value,
-                "memory_type": "field_extraction"
+                "action": turns[-1][1],
+                "extracted_fields": extracted_fields,
+                "interaction_type": "form_filling"
             }
         )
-        return result
\ No newline at end of file
+    
+    def _write_fields(self, session_id: str, fields: Dict[str, str]):
+        """Store field values as Mem0 facts, bypassing Mem0's fact-extraction LLM.
+        
+        Field values are already facts, so they are embedded in one request
+        and upserted into the vector store with the payload `Memory.add`
+        would have written. Ids are derived from session and field, so a new
+        value replaces the previous one instead of piling up next to it.
+        """
+        texts = [f"User's {field_name} is {field_value}" for field_name, field_value in fields.items()]
+        vectors = self._embed_many(texts)
+        created_at = datetime.now(timezone.utc).isoformat()
+        
+        ids = []
+        payloads = []
+        for (field_name, field_value), text in zip(fields.items(), texts):
+            ids.append(str(uuid.uuid5(uuid.NAMESPACE_URL, f"mem0-field:{session_id}:{field_name}")))
+            payloads.append({
+                "field_name": field_name,
+                "field_value": field_value,
+                "memory_type": "field_extraction",
+                "user_id": session_id,
+                "data": text,
+                "hash": hashlib.md5(text.encode()).hexdigest(),
+                "created_at": created_at
+            })
+        
+        self.stats["adds"] += 1
+        self.memory.vector_store.insert(vectors=vectors, ids=ids, payloads=payloads)
+        for memory_id, text in zip(ids, texts):
+            self.memory.db.add_history(memory_id, None, text, "ADD", created_at=created_at)
+    
+    def _embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Embed several texts, in a single request when the embedder supports batches."""
+        embedder = self.memory.embedding_model
+        client = getattr(embedder, "client", None)
+        if client is not None and hasattr(client, "embeddings"):
+            response = client.embeddings.create(
+                input=[text.replace("\n", " ") for text in texts],
+                model=embedder.config.model,
+                dimensions=embedder.config.embedding_dims
+            )
+            return [item.embedding for item in response.data]
+        return [embedder.embed(text, memory_action="add") for text in texts]
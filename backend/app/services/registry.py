@@ -0,0 +1,218 @@
+"""Process-wide registry for services that are expensive to construct.
+
+The registry is created once in the FastAPI lifespan (see `app.main`) and
+handed to request handlers through the dependencies defined at the bottom of
+this module, so packets never rebuild LLM, Mem0 or Groq clients.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+from fastapi import HTTPException
+from starlette.requests import HTTPConnection
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class NullMemoryService:
+    """Stand-in for Mem0 while it is unavailable: no context, and turns are not stored."""
+
+    async def add_conversation_memory(self, text: str, session_id: str, action_taken: str, extracted_fields: Dict = None):
+        pass
+
+    async def update_field_memories(self, session_id: str, fields: Dict[str, str]):
+        pass
+
+    async def get_relevant_context(self, query: str, session_id: str, limit: int = 5) -> str:
+        return ""
+
+    async def search_context(self, query: str, session_id: str, limit: int = 5) -> str:
+        return ""
+
+
+class ServiceRegistry:
+    """Creates shared services once and tracks their health."""
+
+    # Order matters: the pipeline wraps the extractor
+    SERVICE_NAMES = ("extractor", "pipeline", "memory", "transcription")
+
+    def __init__(self):
+        self.http_client: Optional[httpx.AsyncClient] = None
+        self.extractor = None
+        self.pipeline = None
+        self.memory = None
+        self.transcription = None
+        self.status: Dict[str, str] = {name: "pending" for name in self.SERVICE_NAMES}
+        self._failed_at: Dict[str, float] = {}  # Monotonic time of each service's last failed build
+        self._lock = asyncio.Lock()
+
+    def _http_limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+        )
+
+    def _build_extractor(self):
+        from app.agents.intelligent_extractor import IntelligentExtractor
+        return IntelligentExtractor()
+
+    def _build_pipeline(self):
+        from app.agents.pipeline import TieredExtractionPipeline
+        if self.extractor is None:
+            raise RuntimeError("extractor is not available")
+        return TieredExtractionPipeline(self.extractor)
+
+    def _build_memory(self):
+        from app.services.mem0_memory import Mem0MemoryService
+        return Mem0MemoryService()
+
+    def _build_transcription(self):
+        from app.services.groq_transcription import GroqTranscriptionService
+        return GroqTranscriptionService(http_client=self.http_client)
+
+    async def _start_service(self, name: str, builder: Callable[[], Any], blocking: bool = False):
+        """Build a single service, recording failures instead of raising."""
+        try:
+            service = await asyncio.to_thread(builder) if blocking else builder()
+        except Exception as e:
+            logger.error(f"Failed to start service '{name}': {e}", exc_info=True)
+            self.status[name] = f"error: {e}"
+            self._failed_at[name] = time.monotonic()
+            return None
+        self._failed_at.pop(name, None)
+        setattr(self, name, service)
+        self.status[name] = "ready"
+        logger.info(f"Service '{name}' ready")
+        return service
+
+    def _builder(self, name: str):
+        # Memory.from_config talks to Qdrant, so it is built off the event loop
+        return {
+            "extractor": (self._build_extractor, False),
+            "pipeline": (self._build_pipeline, False),
+            "memory": (self._build_memory, True),
+            "transcription": (self._build_transcription, False),
+        }[name]
+
+    async def startup(self):
+        """Create the shared HTTP pool and warm up every service."""
+        self.http_client = httpx.AsyncClient(
+            limits=self._http_limits(),
+            timeout=settings.http_timeout,
+        )
+
+        # Route DSPy's litellm traffic through pooled clients as well
+        import litellm
+        litellm.client_session = httpx.Client(limits=self._http_limits(), timeout=settings.http_timeout)
+        litellm.aclient_session = httpx.AsyncClient(limits=self._http_limits(), timeout=settings.http_timeout)
+
+        for name in self.SERVICE_NAMES:
+            builder, blocking = self._builder(name)
+            await self._start_service(name, builder, blocking)
+
+    async def shutdown(self):
+        """Close pooled connections."""
+        import litellm
+        if litellm.aclient_session is not None:
+            await litellm.aclient_session.aclose()
+            litellm.aclient_session = None
+        if litellm.client_session is not None:
+            litellm.client_session.close()
+            litellm.client_session = None
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+        if self.memory is not None:
+            # Pending write-behind memories are flushed before the process exits
+            await self.memory.close()
+        if self.extractor is not None and self.extractor.cache is not None:
+            self.extractor.cache.close()
+        for name in self.SERVICE_NAMES:
+            setattr(self, name, None)
+            self.status[name] = "stopped"
+
+    async def get(self, name: str):
+        """Return a service, rebuilding it if it is missing.
+
+        A failed build is not retried for `service_retry_cooldown` seconds;
+        until then callers fail fast instead of each waiting on the same
+        connection timeout.
+        """
+        service = getattr(self, name)
+        if service is not None:
+            return service
+        if self._cooling_down(name):
+            raise RuntimeError(f"Service '{name}' unavailable ({self.status[name]})")
+        async with self._lock:
+            service = getattr(self, name)
+            if service is None and not self._cooling_down(name):
+                builder, blocking = self._builder(name)
+                service = await self._start_service(name, builder, blocking)
+        if service is None:
+            raise RuntimeError(f"Service '{name}' unavailable ({self.status[name]})")
+        return service
+
+    def _cooling_down(self, name: str) -> bool:
+        failed_at = self._failed_at.get(name)
+        return failed_at is not None and time.monotonic() - failed_at < settings.service_retry_cooldown
+
+    async def memory_or_null(self):
+        """Mem0, or a `NullMemoryService` while it is down, so extraction never depends on it."""
+        try:
+            return await self.get("memory")
+        except RuntimeError as e:
+            logger.warning(f"Continuing without conversation memory: {e}")
+            return NULL_MEMORY
+
+    def health(self) -> Dict[str, Any]:
+        """Summarize service status for the /health endpoint."""
+        healthy = all(state == "ready" for state in self.status.values())
+        health = {
+            "status": "healthy" if healthy else "degraded",
+            "services": dict(self.status),
+        }
+        if self.extractor is not None and self.extractor.cache is not None:
+            health["llm_cache"] = self.extractor.cache.stats()
+        if self.pipeline is not None:
+            health["extraction_tiers"] = dict(self.pipeline.stats)
+        if self.memory is not None:
+            health["memory"] = self.memory.health()
+        return health
+
+
+NULL_MEMORY = NullMemoryService()
+
+
+# FastAPI dependencies. HTTPConnection works for both HTTP and WebSocket routes.
+
+def get_services(conn: HTTPConnection) -> ServiceRegistry:
+    return conn.app.state.services
+
+
+async def _require(conn: HTTPConnection, name: str):
+    try:
+        return await get_services(conn).get(name)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+async def get_extractor(conn: HTTPConnection):
+    return await _require(conn, "extractor")
+
+
+async def get_pipeline(conn: HTTPConnection):
+    return await _require(conn, "pipeline")
+
+
+async def get_memory(conn: HTTPConnection):
+    # Optional: requests are served without conversation context rather than refused
+    return await get_services(conn).memory_or_null()
+
+
+async def get_transcription(conn: HTTPConnection):
+    return await _require(conn, "transcription")
@@ -0,0 +1,117 @@
+"""Isolation for blocking third-party clients.
+
+`BoundedExecutor` runs blocking calls on a dedicated, separately sized thread
+pool with a per-call timeout, so they cannot exhaust the event loop's default
+executor. `CircuitBreaker` stops calling a dependency that keeps failing and
+lets a single trial call through once its cool-down has passed.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.failures < self.failure_threshold:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go through now."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        if self.failures >= self.failure_threshold:
+            logger.info(f"Circuit '{self.name}' closed again")
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.failures >= self.failure_threshold:
+            # Opening (or a failed trial) restarts the cool-down
+            self.opened_at = time.monotonic()
+            logger.warning(f"Circuit '{self.name}' open for {self.reset_seconds}s after {self.failures} failures")
+
+
+class BoundedExecutor:
+    """Dedicated thread pool with per-call timeouts, circuit breaking and counters."""
+
+    def __init__(self, name: str, max_workers: int, breaker: CircuitBreaker):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.breaker = breaker
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self.in_flight = 0
+        self.stats = {"calls": 0, "failures": 0, "timeouts": 0, "rejected": 0, "total_seconds": 0.0}
+
+    async def run(self, timeout: float, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run `fn` on the pool. Raises CircuitOpenError, asyncio.TimeoutError or fn's error."""
+        if not self.breaker.allow():
+            self.stats["rejected"] += 1
+            raise CircuitOpenError(f"Circuit '{self.breaker.name}' is open")
+
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        self.in_flight += 1
+        self.stats["calls"] += 1
+        try:
+            # A timed-out call keeps its thread until it returns; the breaker stops new ones piling up
+            result = await asyncio.wait_for(
+                loop.run_in_executor(self._pool, lambda: fn(*args, **kwargs)),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            self.stats["failures"] += 1
+            self.breaker.record_failure()
+            raise
+        finally:
+            self.in_flight -= 1
+            self.stats["total_seconds"] += time.monotonic() - started
+        self.breaker.record_success()
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        calls = self.stats["calls"]
+        return {
+            **self.stats,
+            "total_seconds": round(self.stats["total_seconds"], 3),
+            "avg_seconds": round(self.stats["total_seconds"] / calls, 3) if calls else 0.0,
+            "in_flight": self.in_flight,
+            "max_workers": self.max_workers,
+            "circuit": self.breaker.state,
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,173 @@
+"""Per-session ordered work queue with backpressure.
+
+The WebSocket receive loop submits work items without awaiting them; a single
+worker task per session processes them in arrival order. When the queue is
+full, the configured `QueueFullPolicy` decides what gives way; control items
+such as "stop" bypass the bound and are never dropped. An optional
+`on_idle` callback runs on the worker once no work has arrived for
+`idle_after` seconds.
+"""
+
+import asyncio
+import io
+import logging
+import wave
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Awaitable, Callable, Deque, Optional
+
+from app.services.audio_io import AudioPayload
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullPolicy(Enum):
+    DROP_OLDEST = "drop_oldest"  # Discard the oldest queued item to make room
+    COALESCE = "coalesce"        # Merge into the newest queued item of the same kind
+    REJECT = "reject"            # Refuse the new item
+
+
+# Kinds that are always admitted and never dropped, whatever the policy
+CONTROL_KINDS = frozenset({"stop"})
+
+
+@dataclass
+class WorkItem:
+    kind: str  # "audio" or "text" (data), or "stop" (control, see CONTROL_KINDS)
+    payload: Optional[AudioPayload | str] = None
+    filename: str = "audio.webm"
+
+    def merge(self, other: "WorkItem") -> Optional["WorkItem"]:
+        """Combine two consecutive items into one, or None if they cannot be merged."""
+        if self.kind != other.kind:
+            return None
+        if self.kind == "text":
+            return WorkItem("text", f"{self.payload} {other.payload}")
+        if self.kind == "audio" and self.filename == other.filename and self.filename.endswith(".wav"):
+            return WorkItem("audio", _concat_wav(self.payload, other.payload), self.filename)
+        return None
+
+
+def _concat_wav(first: AudioPayload, second: AudioPayload) -> bytes:
+    """Join two WAV utterances with identical formats into one."""
+    with wave.open(io.BytesIO(first), "rb") as a, wave.open(io.BytesIO(second), "rb") as b:
+        params = a.getparams()
+        frames = [a.readframes(a.getnframes()), b.readframes(b.getnframes())]
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as out:
+        out.setparams(params)
+        for chunk in frames:
+            out.writeframes(chunk)
+    return buffer.getvalue()
+
+
+class SessionWorkQueue:
+    """Bounded FIFO of work items drained by one worker task."""
+
+    def __init__(
+        self,
+        handler: Callable[[WorkItem], Awaitable[None]],
+        maxsize: int,
+        policy: QueueFullPolicy,
+        name: str = "",
+        on_idle: Optional[Callable[[], Awaitable[None]]] = None,
+        idle_after: float = 0.0,
+    ):
+        self.handler = handler
+        self.on_idle = on_idle
+        self.idle_after = idle_after
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.name = name
+        self.dropped = 0
+
+        self._items: Deque[WorkItem] = deque()
+        self._available = asyncio.Event()
+        self._closing = False
+        self._worker: Optional[asyncio.Task] = None
+        self._busy_since_idle = False
+
+    @property
+    def depth(self) -> int:
+        return len(self._items)
+
+    @property
+    def data_depth(self) -> int:
+        """Queued items that count against `maxsize`; control items do not."""
+        return sum(1 for item in self._items if item.kind not in CONTROL_KINDS)
+
+    def start(self):
+        self._worker = asyncio.create_task(self._run())
+
+    def submit(self, item: WorkItem) -> bool:
+        """Queue an item without blocking. Returns False if it was rejected."""
+        if self._closing:
+            return False
+
+        if item.kind not in CONTROL_KINDS and self.data_depth >= self.maxsize:
+            if self.policy == QueueFullPolicy.DROP_OLDEST:
+                dropped = self._drop_oldest_data()
+                self.dropped += 1
+                logger.warning(f"[{self.name}] Queue full, dropped oldest {dropped.kind} item")
+            elif self.policy == QueueFullPolicy.COALESCE:
+                merged = self._items[-1].merge(item)
+                if merged is None:
+                    self.dropped += 1
+                    logger.warning(f"[{self.name}] Queue full, cannot coalesce {item.kind} item")
+                    return False
+                self._items[-1] = merged
+                return True
+            else:
+                self.dropped += 1
+                logger.warning(f"[{self.name}] Queue full, rejected {item.kind} item")
+                return False
+
+        self._items.append(item)
+        self._available.set()
+        return True
+
+    def _drop_oldest_data(self) -> WorkItem:
+        for index, queued in enumerate(self._items):
+            if queued.kind not in CONTROL_KINDS:
+                del self._items[index]
+                return queued
+        raise RuntimeError("queue full of control items")
+
+    async def close(self):
+        """Stop accepting work and wait for queued items to finish."""
+        self._closing = True
+        self._available.set()
+        if self._worker is not None:
+            await self._worker
+            self._worker = None
+
+    async def _run(self):
+        while True:
+            if not self._items:
+                if self._closing:
+                    return
+                self._available.clear()
+                if self.on_idle is not None and self._busy_since_idle:
+                    try:
+                        await asyncio.wait_for(self._available.wait(), timeout=self.idle_after)
+                    except asyncio.TimeoutError:
+                        await self._run_idle()
+                    continue
+                await self._available.wait()
+                continue
+
+            item = self._items.popleft()
+            self._busy_since_idle = True
+            try:
+                await self.handler(item)
+            except Exception as e:
+                logger.error(f"[{self.name}] Error processing {item.kind} item: {e}", exc_info=True)
+
+    async def _run_idle(self):
+        # Runs once per quiet period; new work re-arms it
+        self._busy_since_idle = False
+        try:
+            await self.on_idle()
+        except Exception as e:
+            logger.error(f"[{self.name}] Error in idle callback: {e}", exc_info=True)
@@ -0,0 +1,59 @@
+"""Persistence of extracted field values."""
+
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import select
+
+from app.database import async_session, dialect_insert, SessionFieldValue, SQLITE_MAX_VARIABLES
+
+
+async def upsert_session_fields(
+    session_id: str,
+    fields: Dict[str, str],
+    confidences: Optional[Dict[str, float]] = None
+) -> None:
+    """Write an utterance's extracted fields for a session.
+    
+    Fields are written with multi-row INSERT ... ON CONFLICT statements in
+    one transaction, as few as SQLite's bound-parameter limit allows (5 per
+    row); values for other fields are kept.
+    """
+    if not fields:
+        return
+    
+    now = datetime.utcnow()
+    rows = [
+        {
+            "session_id": session_id,
+            "field": field,
+            "value": value,
+            "confidence": (confidences or {}).get(field),
+            "updated_at": now
+        }
+        for field, value in fields.items()
+    ]
+    rows_per_statement = SQLITE_MAX_VARIABLES // 5
+    async with async_session() as db:
+        for start in range(0, len(rows), rows_per_statement):
+            stmt = dialect_insert(SessionFieldValue).values(rows[start:start + rows_per_statement])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[SessionFieldValue.session_id, SessionFieldValue.field],
+                set_={
+                    "value": stmt.excluded.value,
+                    "confidence": stmt.excluded.confidence,
+                    "updated_at": stmt.excluded.updated_at
+                }
+            )
+            await db.execute(stmt)
+        await db.commit()
+
+
+async def get_session_values(session_id: str) -> Dict[str, str]:
+    """Current field values of a session (a primary-key range scan)."""
+    async with async_session() as db:
+        result = await db.execute(
+            select(SessionFieldValue.field, SessionFieldValue.value)
+            .where(SessionFieldValue.session_id == session_id)
+        )
+        return {field: value for field, value in result.all()}
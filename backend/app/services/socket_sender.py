@@ -0,0 +1,134 @@
+"""Per-socket outbound queue for WebSocket fan-out.
+
+Broadcasting awaits nothing: `ConnectionManager` serializes each message once
+and hands the text to every socket's `SocketSender`, whose writer task sends
+it. A socket whose queue overflows, or whose send stalls past `send_timeout`,
+is evicted and closed so it cannot hold up the other tabs of its session.
+
+Field updates that queue up while the writer is busy go out together as one
+`field_updates` frame, keeping only the latest value of each field.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+# 1008 "policy violation": the client fell too far behind or stopped reading
+EVICTION_CLOSE_CODE = 1008
+
+
+class SocketSender:
+    """Bounded outbound queue drained by one writer task."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        maxsize: int,
+        send_timeout: float,
+        max_batch: int,
+        on_evict: Optional[Callable[["SocketSender", str], None]] = None,
+        name: str = "",
+    ):
+        self.websocket = websocket
+        self.maxsize = max(1, maxsize)
+        self.send_timeout = send_timeout
+        self.max_batch = max(1, max_batch)
+        self.on_evict = on_evict
+        self.name = name
+        self.closed = False
+        self.stats = {"frames": 0, "messages": 0, "coalesced": 0}
+
+        # (serialized message, field name for field updates)
+        self._pending: Deque[Tuple[str, Optional[str]]] = deque()
+        self._available = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self._closer: Optional[asyncio.Task] = None
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def start(self):
+        self._writer = asyncio.create_task(self._run())
+
+    def send(self, message: str, field: Optional[str] = None) -> bool:
+        """Queue a serialized message without blocking. Returns False if the socket is gone."""
+        if self.closed:
+            return False
+        if len(self._pending) >= self.maxsize:
+            self.evict(f"send queue full ({self.maxsize} messages)")
+            return False
+        self._pending.append((message, field))
+        self._available.set()
+        return True
+
+    def evict(self, reason: str):
+        """Drop queued messages, stop the writer and close the socket."""
+        if self.closed:
+            return
+        logger.warning(f"[{self.name}] Evicting WebSocket: {reason}")
+        self.close()
+        if self.on_evict is not None:
+            self.on_evict(self, reason)
+        self._closer = asyncio.create_task(self._close_socket(reason))
+
+    def close(self):
+        """Stop sending; used once the socket has disconnected."""
+        self.closed = True
+        self._pending.clear()
+        if self._writer is not None and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+        self._writer = None
+
+    async def _close_socket(self, reason: str):
+        try:
+            await asyncio.wait_for(
+                self.websocket.close(code=EVICTION_CLOSE_CODE, reason=reason[:120]),
+                timeout=self.send_timeout
+            )
+        except Exception:
+            # Already gone; the receive loop notices the disconnect either way
+            pass
+
+    async def _run(self):
+        while True:
+            if not self._pending:
+                self._available.clear()
+                await self._available.wait()
+                continue
+
+            frame = self._next_frame()
+            try:
+                await asyncio.wait_for(self.websocket.send_text(frame), timeout=self.send_timeout)
+            except asyncio.TimeoutError:
+                self.evict(f"send took longer than {self.send_timeout}s")
+                return
+            except Exception as e:
+                self.evict(f"send failed: {e}")
+                return
+            self.stats["frames"] += 1
+
+    def _next_frame(self) -> str:
+        """The next message, or a `field_updates` frame for consecutive field updates."""
+        message, field = self._pending.popleft()
+        self.stats["messages"] += 1
+        if field is None or not self._pending or self._pending[0][1] is None:
+            return message
+
+        updates: Dict[str, str] = {field: message}
+        while self._pending and self._pending[0][1] is not None and len(updates) < self.max_batch:
+            message, field = self._pending.popleft()
+            self.stats["messages"] += 1
+            # The latest value of a field replaces earlier ones
+            updates.pop(field, None)
+            updates[field] = message
+        if len(updates) == 1:
+            return message
+        self.stats["coalesced"] += len(updates)
+        # Updates are already serialized, so the batch is assembled without re-encoding them
+        return '{"type":"field_updates","updates":[' + ",".join(updates.values()) + "]}"
@@ -0,0 +1,174 @@
+"""
+Benchmark: allocations per megabyte of audio on the WebSocket audio path.
+
+Each transport is pushed through the same handler path the WebSocket uses:
+
+    frame -> audio bytes -> AudioSegmenter.feed -> utterance -> upload body
+
+- "legacy binary (b64)": binary frame, base64-encoded in the receive loop and
+  decoded again in process_audio_chunk (the old behaviour)
+- "binary": binary frame carried as raw bytes
+- "json audio_chunk": JSON text frame, parsed and base64-decoded once at the edge
+
+The upload body is the multipart request GroqTranscriptionService sends,
+rendered chunk by chunk as httpx would write it to the socket.
+
+With ffmpeg on PATH the stream is real WebM/Opus decoded by the segmenter's
+ffmpeg process. Without it, the packets are raw PCM and the segmenter's
+decoder is bypassed (its VAD, utterance assembly and WAV wrapping still run);
+the transport comparison is unaffected, since every transport hands the
+decoder identical bytes.
+
+Allocation is measured with tracemalloc as the sum of per-packet peak
+allocations, i.e. the bytes that had to be allocated to take each packet from
+the socket to the upload body. Python-side only: ffmpeg's own memory is not
+counted.
+
+Usage (from backend/):
+    python -m benchmarks.bench_audio_path
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import math
+import shutil
+import subprocess
+import sys
+import time
+import tracemalloc
+from array import array
+from pathlib import Path
+from typing import List
+
+import httpx
+
+sys.path.append(str(Path(__file__).parent.parent))
+from app.config.settings import settings
+from app.services.audio_io import AudioPayload, AudioReader, decode_audio_payload
+from app.services.audio_segmenter import AudioSegmenter, FRAME_BYTES, SAMPLE_RATE
+
+MB = 1024 * 1024
+
+
+def synthetic_speech(seconds: float) -> bytes:
+    """16 kHz s16le PCM alternating 1.5 s of tone ("speech") and 1.2 s of silence."""
+    samples = array("h")
+    period = int(2.7 * SAMPLE_RATE)
+    for i in range(int(seconds * SAMPLE_RATE)):
+        speaking = i % period < 1.5 * SAMPLE_RATE
+        samples.append(int(8000 * math.sin(2 * math.pi * 220 * i / SAMPLE_RATE)) if speaking else 0)
+    return samples.tobytes()
+
+
+def encode_webm(pcm: bytes) -> bytes:
+    return subprocess.run(
+        [
+            settings.ffmpeg_path, "-hide_banner", "-loglevel", "error",
+            "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-i", "pipe:0",
+            "-c:a", "libopus", "-f", "webm", "pipe:1",
+        ],
+        input=pcm, capture_output=True, check=True
+    ).stdout
+
+
+class PcmSegmenter(AudioSegmenter):
+    """AudioSegmenter fed raw PCM, for machines without ffmpeg."""
+
+    async def start(self):
+        self._pending = bytearray()
+
+    async def feed(self, packet: AudioPayload) -> List[memoryview]:
+        self._pending += packet
+        usable = len(self._pending) - len(self._pending) % FRAME_BYTES
+        with memoryview(self._pending) as view:
+            for offset in range(0, usable, FRAME_BYTES):
+                self._process_frame(bytes(view[offset:offset + FRAME_BYTES]))
+        del self._pending[:usable]
+        return self._drain_ready()
+
+    async def close(self) -> List[memoryview]:
+        self._emit()
+        return self._drain_ready()
+
+
+# Transports: what the receive loop does to get audio bytes out of a frame
+
+def legacy_binary(frame: bytes) -> bytes:
+    audio_base64 = base64.b64encode(frame).decode('utf-8')
+    return base64.b64decode(audio_base64)
+
+
+def binary(frame: bytes) -> bytes:
+    return frame
+
+
+def json_audio_chunk(frame: str) -> bytes:
+    return decode_audio_payload(json.loads(frame)["data"])
+
+
+def upload(utterance: AudioPayload) -> int:
+    """Render the transcription upload body as httpx streams it; returns its size."""
+    content = utterance if isinstance(utterance, bytes) else AudioReader(utterance)
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/audio/transcriptions",
+                            files={"file": ("utterance.wav", content)})
+    return sum(len(chunk) for chunk in request.stream)
+
+
+async def run_path(name: str, ingest, frames, segmenter_cls, total_bytes: int):
+    segmenter = await segmenter_cls.create()
+    utterances = 0
+    uploaded = 0
+
+    tracemalloc.start()
+    allocated = 0
+    started = time.perf_counter()
+    for frame in frames:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for utterance in await segmenter.feed(ingest(frame)):
+            utterances += 1
+            uploaded += upload(utterance)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += max(0, peak - baseline)
+    for utterance in await segmenter.close():
+        utterances += 1
+        uploaded += upload(utterance)
+    elapsed = time.perf_counter() - started
+    tracemalloc.stop()
+
+    megabytes = total_bytes / MB
+    print(
+        f"{name:<22} {allocated / megabytes / 1024:>10.1f} KiB allocated/MB "
+        f"{elapsed * 1000 / megabytes:>8.2f} ms/MB "
+        f"({utterances} utterances, {uploaded / MB:.1f} MB uploaded)"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Audio path allocation benchmark")
+    parser.add_argument("--seconds", type=float, default=120.0, help="Seconds of synthetic audio")
+    parser.add_argument("--packet-size", type=int, default=4096, help="Bytes per WebSocket packet")
+    args = parser.parse_args()
+
+    pcm = synthetic_speech(args.seconds)
+    if shutil.which(settings.ffmpeg_path):
+        stream, segmenter_cls, mode = encode_webm(pcm), AudioSegmenter, "WebM/Opus via ffmpeg"
+    else:
+        stream, segmenter_cls, mode = pcm, PcmSegmenter, "raw PCM, ffmpeg not found (decoder bypassed)"
+
+    packets = [stream[i:i + args.packet_size] for i in range(0, len(stream), args.packet_size)]
+    json_frames = [
+        json.dumps({"type": "audio_chunk", "data": base64.b64encode(p).decode('utf-8')}) for p in packets
+    ]
+    total_bytes = len(stream)
+
+    print(f"{len(packets)} packets of {args.packet_size} bytes ({total_bytes / MB:.1f} MB, {mode})\n")
+    await run_path("legacy binary (b64)", legacy_binary, packets, segmenter_cls, total_bytes)
+    await run_path("binary", binary, packets, segmenter_cls, total_bytes)
+    await run_path("json audio_chunk", json_audio_chunk, json_frames, segmenter_cls, total_bytes)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,21 @@
+from app.agents.extractor import extractor
+
+
+def test_unlabeled_age_stays_below_rule_threshold():
+    matches = extractor.extract_with_confidence("my 80 year old mother has diabetes", ["Age"])
+    assert matches["Age"] == ("80", 0.6)
+
+
+def test_labeled_age_beats_earlier_unlabeled_age():
+    matches = extractor.extract_with_confidence("my 80 year old mother, age: 45", ["Age"])
+    assert matches["Age"] == ("45", 0.8)
+
+
+def test_label_values_end_at_next_label_or_separator():
+    fields = ["Blood Pressure", "Heart Rate", "Notes"]
+    matches = extractor.extract_with_confidence("blood pressure: 120 over 80 and heart rate 70 notes: stable", fields)
+    assert matches == {
+        "Blood Pressure": ("120 over 80", 0.85),
+        "Heart Rate": ("70", 0.6),
+        "Notes": ("stable", 0.85),
+    }
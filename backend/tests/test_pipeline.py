@@ -0,0 +1,60 @@
+import asyncio
+from datetime import datetime
+
+from app.agents.pipeline import TieredExtractionPipeline
+from app.services.field_state import FieldState, SessionFieldState
+
+
+def gate(text, extracted, confidences, stored):
+    pipeline = TieredExtractionPipeline(intelligent_extractor=None)
+    state = SessionFieldState("session", {
+        field: FieldState(value, confidence, datetime.utcnow())
+        for field, (value, confidence) in stored.items()
+    })
+    return pipeline._gate({"extracted_fields": extracted, "confidences": confidences}, state, text)
+
+
+def test_value_in_text_does_not_override_more_confident_value():
+    result = gate(
+        "I spoke with Dr Adams yesterday",
+        {"Name": "Adams"}, {"Name": 0.4},
+        {"Name": ("John Smith", 0.8)}
+    )
+    assert result["extracted_fields"] == {}
+
+
+def test_correction_cue_overrides_more_confident_value():
+    result = gate(
+        "actually it's John Adams",
+        {"Name": "John Adams"}, {"Name": 0.4},
+        {"Name": ("John Smith", 0.8)}
+    )
+    assert result["extracted_fields"] == {"Name": "John Adams"}
+
+
+def test_mentioned_field_overrides_more_confident_value():
+    result = gate(
+        "my name is John Adams",
+        {"Name": "John Adams"}, {"Name": 0.4},
+        {"Name": ("John Smith", 0.8)}
+    )
+    assert result["extracted_fields"] == {"Name": "John Adams"}
+
+
+class RecordingExtractor:
+    def __init__(self):
+        self.calls = []
+
+    async def aforward(self, text, fields, mem0_context="", on_field=None):
+        self.calls.append(fields)
+        return {"action_type": "extract_fields", "reasoning": "", "extracted_fields": {}, "confidences": {}}
+
+
+def test_settled_unmentioned_fields_skip_the_llm():
+    llm = RecordingExtractor()
+    pipeline = TieredExtractionPipeline(intelligent_extractor=llm)
+    state = SessionFieldState("session", {"Name": FieldState("John Smith", 0.95, datetime.utcnow())})
+    result = asyncio.run(pipeline.aforward("we talked about the weather", ["Name"], state=state))
+    assert llm.calls == []
+    assert result["action_type"] == "store_context"
+    assert not TieredExtractionPipeline.is_ambiguous(result)
@@ -1,5 +1,6 @@
 import { useCallback, useEffect, useRef, useState } from "react";
 import { getHttpBase, getWsBase } from "@/config/api";
+import { fieldUpdatesFrom } from "@/lib/fieldUpdates";
 
 export interface TranscriptItem {
   id: string;
@@ -123,13 +124,17 @@ export function useMedicalSession() {
         if (typeof data.transcript === 'string') {
           setTranscript((prev) => [...prev, { id: crypto.randomUUID(), text: data.transcript, ts: Date.now() }]);
         }
-        if (data && typeof data.field === 'string' && typeof data.value === 'string') {
-          const f = data.field.toLowerCase();
+        const updates = fieldUpdatesFrom(data);
+        if (updates.length) {
           setFields((prev) => {
-            if (f.includes('symptom')) return { ...prev, symptoms: data.value };
-            if (f.includes('drug') || f.includes('medication') || f.includes('medicine')) return { ...prev, medications: data.value };
-            if (f.includes('conclusion') || f.includes('instruction') || f.includes('note')) return { ...prev, conclusion: data.value };
-            return prev;
+            let next = prev;
+            for (const { field, value } of updates) {
+              const f = field.toLowerCase();
+              if (f.includes('symptom')) next = { ...next, symptoms: value };
+              else if (f.includes('drug') || f.includes('medication') || f.includes('medicine')) next = { ...next, medications: value };
+              else if (f.includes('conclusion') || f.includes('instruction') || f.includes('note')) next = { ...next, conclusion: value };
+            }
+            return next;
           });
         } else {
           setFields((prev) => ({
@@ -0,0 +1,24 @@
+export interface FieldUpdate {
+  field: string;
+  value: string;
+}
+
+// Field values carried by a session WebSocket message: a single `field_update`
+// (possibly a streamed partial), a `field_updates` batch of several of them, or
+// the `field_reconcile` sent once extraction for an utterance has finished,
+// whose values replace any partials.
+export function fieldUpdatesFrom(data: any): FieldUpdate[] {
+  if (!data || typeof data !== 'object') return [];
+  if (data.type === 'field_updates' && Array.isArray(data.updates)) {
+    return data.updates.flatMap(fieldUpdatesFrom);
+  }
+  if (data.type === 'field_reconcile' && data.fields && typeof data.fields === 'object') {
+    return Object.entries(data.fields)
+      .filter(([, value]) => typeof value === 'string')
+      .map(([field, value]) => ({ field, value: value as string }));
+  }
+  if (typeof data.field === 'string' && typeof data.value === 'string') {
+    return [{ field: data.field, value: data.value }];
+  }
+  return [];
+}
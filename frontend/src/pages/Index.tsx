@@ -14,6 +14,7 @@ import { PencilLoader } from "@/components/PencilLoader";
 import { useMedicalSession } from "@/hooks/useMedicalSession";
 import { toast } from "sonner";
 import { getHttpBase, getWsBase } from "@/config/api";
+import { fieldUpdatesFrom } from "@/lib/fieldUpdates";
 import RecorderControls from "@/components/RecorderControls";
 
 type SchemaInfo = {
@@ -247,11 +248,14 @@ const Index = () => {
         setSessionDetails((prev) => {
           const prevFields = (prev?.fields || {}) as any;
           let next = { ...prevFields } as any;
-          if (data && typeof data.field === 'string' && typeof data.value === 'string') {
-            const f = data.field.toLowerCase();
-            if (f.includes('symptom')) next.symptoms = data.value;
-            else if (f.includes('drug') || f.includes('medication') || f.includes('medicine')) next.medications = data.value;
-            else if (f.includes('conclusion') || f.includes('instruction') || f.includes('note')) next.conclusion = data.value;
+          const updates = fieldUpdatesFrom(data);
+          if (updates.length) {
+            for (const { field, value } of updates) {
+              const f = field.toLowerCase();
+              if (f.includes('symptom')) next.symptoms = value;
+              else if (f.includes('drug') || f.includes('medication') || f.includes('medicine')) next.medications = value;
+              else if (f.includes('conclusion') || f.includes('instruction') || f.includes('note')) next.conclusion = value;
+            }
           } else {
             next = {
               symptoms: data.symptoms ?? data.symptom ?? next.symptoms,